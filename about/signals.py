@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from about.models import FAQ
+from service import counters
+
+
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def bump_faq_counter(sender, raw=False, **kwargs):
+    if not raw:
+        counters.bump([counters.FAQ_KEY])
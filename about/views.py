@@ -2,14 +2,28 @@ from rest_framework.viewsets import ModelViewSet
 
 from about.models import FAQ, Feedback
 from about.serializers import FAQSerializer, FeedbackSerializer
+from service import counters
+from service.conditional import conditional, make_etag
 from service.permissions import IsAdminOrReadOnly
 
 
+def faq_etag(view, request, *args, **kwargs):
+    return make_etag(request, counters.read([counters.FAQ_KEY]))
+
+
 class FAQViewSet(ModelViewSet):
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
     permission_classes = (IsAdminOrReadOnly,)
 
+    @conditional(faq_etag)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional(faq_etag)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class FeedbackViewSet(ModelViewSet):
     queryset = Feedback.objects.all()
@@ -1,5 +1,8 @@
+from django.db.models import Prefetch
+from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -12,14 +15,56 @@ from client.serializers import (
     PasswordChangeSerializer
 )
 from client.models import User
-from service.models import SportsComplex, Booking
+from service import counters
+from service.archive import archived_prefetch, with_archived
+from service.catalogue import get_catalogue
+from service.conditional import conditional, make_etag
+from service.models import SportsComplex, Booking, ArchivedBooking
+from service.pagination import UserPagination
 from service.serializers import SportsComplexRetrieveSerializer
+from service.slots import day_keys
+from service.utils import get_bookings_window
+from service.views import BOOKINGS_PARAMETERS
+
+
+def schedule_etag(view, request, *args, **kwargs):
+    """Bookings version of the complexes the user has bookings at in the
+    window."""
+    try:
+        date_from, date_to = get_bookings_window(request.query_params)
+    except ValidationError:
+        return None
+    complex_ids = sorted(set(
+        with_archived(
+            *(
+                model.objects.filter(
+                    personal_data=request.user,
+                    day__range=(date_from, date_to)
+                ).values_list("field__complex_id", flat=True)
+                for model in (Booking, ArchivedBooking)
+            ),
+            date_from
+        )
+    ))
+    return make_etag(
+        request,
+        request.user.id,
+        date_from,
+        date_to,
+        complex_ids,
+        get_catalogue().digest,
+        counters.bookings_version(
+            field__complex_id__in=complex_ids,
+            day__range=(date_from, date_to)
+        )
+    )
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = UserPagination
 
     def get_permissions(self):
         if self.action == "create":
@@ -42,22 +87,37 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_object(self):
         return self.request.user
 
+    @extend_schema(parameters=BOOKINGS_PARAMETERS)
     @action(
         detail=False,
         methods=["GET"],
         permission_classes=[IsAuthenticated]
     )
+    @conditional(schedule_etag)
     def schedule(self, request):
         user = self.request.user
+        date_from, date_to = get_bookings_window(request.query_params)
         bookings = Booking.objects.filter(
-            personal_data=user
-        ).select_related("field__complex")
-        sport_complex_ids = set(
-            booking.field.complex.id for booking in bookings
+            slot__range=day_keys(date_from, date_to)
+        ).order_by("slot")
+        sport_complex_ids = with_archived(
+            *(
+                model.objects.filter(
+                    personal_data=user,
+                    day__range=(date_from, date_to)
+                ).values("field__complex_id")
+                for model in (Booking, ArchivedBooking)
+            ),
+            date_from
         )
         sport_complexes = SportsComplex.objects.filter(
             id__in=sport_complex_ids
-        ).prefetch_related("fields__bookings")
+        ).prefetch_related(
+            Prefetch("fields__bookings", queryset=bookings),
+            *archived_prefetch(
+                "fields__archived_bookings", date_from, date_to
+            )
+        )
         serializer = self.get_serializer(sport_complexes, many=True)
         return Response(
             serializer.data,
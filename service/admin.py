@@ -1,8 +1,200 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Optional
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Count
+from django.db.models.deletion import Collector
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from service.archive import with_archived
+from service.models import (
+    SportsComplex,
+    SportsField,
+    ArchivedBooking,
+    Booking,
+    Payment,
+    PaymentLine,
+)
+from service.pagination import EstimatedCountPaginator
+
+
+class DateRangeChangeList(ChangeList):
+    """Change list whose date hierarchy lists every period between the
+    first and last date.
+
+    The admin date hierarchy asks for the distinct years, months or days
+    of every matching row. The first and last date give the range instead,
+    at the cost of listing periods without rows. They are read with
+    ordered lookups, SQLite only takes ``Min`` and ``Max`` of a field from
+    an index when they are alone in a query. Rendered by the
+    ``date_range_hierarchy`` tag.
+    """
+
+    def date_range(self) -> tuple[Optional[date], Optional[date]]:
+        dates = self.queryset.filter(
+            **{f"{self.date_hierarchy}__isnull": False}
+        ).values_list(self.date_hierarchy, flat=True)
+        return (
+            dates.order_by(self.date_hierarchy).first(),
+            dates.order_by(f"-{self.date_hierarchy}").first(),
+        )
+
+    def date_periods(self, kind: str) -> list[date]:
+        """First day of every year, month or day of the date range."""
+        current, last = self.date_range()
+        if current is None:
+            return []
+        if kind == "year":
+            return [
+                date(year, 1, 1) for year in range(current.year, last.year + 1)
+            ]
+        if kind == "month":
+            periods = []
+            current = current.replace(day=1)
+            while current <= last:
+                periods.append(current)
+                current = (current + timedelta(days=31)).replace(day=1)
+            return periods
+        return [
+            current + timedelta(days=n)
+            for n in range((last - current).days + 1)
+        ]
+
+
+@admin.register(SportsComplex)
+class SportsComplexAdmin(admin.ModelAdmin):
+    list_display = ("name", "location", "address", "heatmap_link")
+    search_fields = ("name", "address")
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/heatmap/",
+                self.admin_site.admin_view(self.heatmap_view),
+                name="service_sportscomplex_heatmap",
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description="Heatmap")
+    def heatmap_link(self, obj):
+        return format_html(
+            '<a href="{}">Week</a>',
+            reverse("admin:service_sportscomplex_heatmap", args=[obj.pk])
+        )
 
-from service.models import SportsComplex, SportsField, Booking
+    def heatmap_view(self, request, pk):
+        """Share of the complex's fields booked in every slot of a week."""
+        sports_complex = get_object_or_404(
+            SportsComplex.objects.annotate(fields_count=Count("fields")),
+            pk=pk
+        )
+        try:
+            week = datetime.strptime(
+                request.GET.get("week", ""), "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            week = date.today()
+        week -= timedelta(days=week.weekday())
+        days = [week + timedelta(days=n) for n in range(7)]
+        schedule = sports_complex.schedule
+
+        bookings, archived = (
+            model.objects.filter(
+                field__complex=sports_complex,
+                day__range=(days[0], days[-1])
+            ).values("day", "time").annotate(
+                booked=Count("id")
+            ).order_by()
+            for model in (Booking, ArchivedBooking)
+        )
+        # A day being archived has rows in both tables.
+        booked = Counter()
+        for row in with_archived(bookings, archived, days[0]):
+            booked[row["day"], row["time"]] += row["booked"]
+        fields_count = sports_complex.fields_count
+        rows = []
+        for day in days:
+            cells = []
+            for value in schedule.times():
+                count = booked.get((day, value), 0)
+                share = count / fields_count if fields_count else 0
+                cells.append({
+                    "booked": count,
+                    "percent": round(share * 100),
+                    "opacity": round(share, 2),
+                })
+            rows.append({"day": day, "cells": cells})
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": f"{sports_complex} bookings",
+            "opts": self.model._meta,
+            "original": sports_complex,
+            "fields_count": fields_count,
+            "labels": schedule.labels(),
+            "rows": rows,
+            "week": week,
+            "previous_week": week - timedelta(days=7),
+            "next_week": week + timedelta(days=7),
+        }
+        return TemplateResponse(
+            request, "admin/service/sportscomplex/heatmap.html", context
+        )
 
 
-admin.site.register(SportsComplex)
 admin.site.register(SportsField)
-admin.site.register(Booking)
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "day",
+        "time",
+        "field",
+        "complex",
+        "personal_data",
+        "created_at",
+    )
+    list_select_related = ("field__complex", "personal_data")
+    raw_id_fields = ("field", "personal_data")
+    date_hierarchy = "day"
+    ordering = ("-day", "-time")
+    search_fields = ("personal_data__email__exact",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return DateRangeChangeList
+
+    @admin.display(description="Complex")
+    def complex(self, obj):
+        return obj.field.complex
+
+    def delete_queryset(self, request, queryset):
+        # QuerySet.delete() drops select_related, while the delete signal
+        # reads the schedule of every booking's complex.
+        collector = Collector(using=queryset.db)
+        collector.collect(list(queryset.select_related("field__complex")))
+        collector.delete()
+
+
+class PaymentLineInline(admin.TabularInline):
+    model = PaymentLine
+    raw_id_fields = ("booking",)
+    extra = 0
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "money_to_pay", "session_id")
+    ordering = ("-id",)
+    search_fields = ("session_id__exact",)
+    inlines = (PaymentLineInline,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
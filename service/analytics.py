@@ -0,0 +1,298 @@
+"""Occupancy and revenue analytics served from daily usage rollups.
+
+``rollup_days`` turns the occupancy bitmaps and paid payment lines, live
+and archived, of a batch of days into ``UsageRollup`` rows per complex,
+activity and hour, the ``rollup_usage`` command calls it for the days
+whose ``usage:<day>`` counter moved and then sums the changed months into
+``UsageRollupMonth``.
+``usage_report`` reads whole months of a date range from the monthly
+rollups and only the remaining days from the daily ones, sums them in SQL
+and breaks them down with NumPy. Reports are cached per process under the
+rollup and catalogue counters, so they stay valid until the next rollup.
+"""
+from datetime import date, timedelta
+from threading import Lock
+from typing import Optional
+
+import numpy as np
+from cachetools import LRUCache
+from django.db.models import Q, Sum
+
+from service import counters
+from service.archive import needs_archive
+from service.catalogue import get_catalogue
+from service.models import (
+    ArchivedPaymentLine,
+    FieldOccupancy,
+    Payment,
+    PaymentLine,
+    SportsField,
+    UsageRollup,
+    UsageRollupMonth,
+)
+from service.slots import MAX_SLOTS_PER_DAY
+
+ACTIVITIES = SportsField.SportsActivity.values
+HOURS_PER_DAY = 24
+
+_reports = LRUCache(maxsize=256)
+_lock = Lock()
+
+
+def rollup_days(days: list[date], fields: list[tuple]) -> list[UsageRollup]:
+    """Rollup rows of ``days``.
+
+    ``fields`` are ``(id, complex_id, activity)`` tuples of every field.
+    """
+    day_index = {day: n for n, day in enumerate(days)}
+    field_index = {field[0]: n for n, field in enumerate(fields)}
+    groups = sorted({field[1:] for field in fields})
+    group_index = {group: n for n, group in enumerate(groups)}
+    field_group = np.array(
+        [group_index[field[1:]] for field in fields], dtype=np.intp
+    )
+    # Hour every slot of a group starts in, -1 after the last slot.
+    schedules = get_catalogue().schedules
+    slot_hours = np.full((len(groups), MAX_SLOTS_PER_DAY), -1, dtype=np.intp)
+    for n, (complex_id, _) in enumerate(groups):
+        hours = [value.hour for value in schedules[complex_id].times()]
+        slot_hours[n, :len(hours)] = hours
+
+    # days x groups x hours, summed over the fields of each group.
+    shape = (len(days), len(groups), HOURS_PER_DAY)
+    booked = np.zeros(shape, dtype=np.int32)
+    paid = np.zeros(shape, dtype=np.int32)
+    revenue = np.zeros(shape, dtype=np.int64)
+
+    occupancy = [
+        (day_index[day], field_index[field_id], slots)
+        for day, field_id, slots in FieldOccupancy.objects.filter(
+            day__in=days, slots__gt=0
+        ).values_list("day", "field_id", "slots")
+        if field_id in field_index
+    ]
+    if occupancy:
+        day_of, field_of, masks = np.array(occupancy, dtype=np.int64).T
+        group_of = field_group[field_of]
+        # Every set bit of every mask, bit n is the n-th slot of the day.
+        row, bit = np.nonzero(
+            (masks[:, None] >> np.arange(MAX_SLOTS_PER_DAY)) & 1
+        )
+        hour_of = slot_hours[group_of[row], bit]
+        on_grid = hour_of >= 0
+        row = row[on_grid]
+        np.add.at(
+            booked, (day_of[row], group_of[row], hour_of[on_grid]), 1
+        )
+
+    models = [PaymentLine]
+    if needs_archive(min(days)):
+        models.append(ArchivedPaymentLine)
+    lines = [
+        (
+            day_index[day],
+            field_index[field_id],
+            booked_time.hour,
+            unit_amount,
+        )
+        for model in models
+        for day, field_id, booked_time, unit_amount
+        in model.objects.filter(
+            booking__day__in=days,
+            payment__status=Payment.PaymentStatus.PAID
+        ).values_list(
+            "booking__day", "booking__field_id", "booking__time", "unit_amount"
+        )
+        if field_id in field_index
+    ]
+    if lines:
+        day_of, field_of, hour_of, amounts = np.array(
+            lines, dtype=np.int64
+        ).T
+        cells = (day_of, field_group[field_of], hour_of)
+        np.add.at(paid, cells, 1)
+        np.add.at(revenue, cells, amounts)
+
+    return [
+        UsageRollup(
+            day=days[day],
+            complex_id=groups[group][0],
+            activity=groups[group][1],
+            hour=int(hour),
+            booked=int(booked[day, group, hour]),
+            paid=int(paid[day, group, hour]),
+            revenue=int(revenue[day, group, hour]),
+        )
+        for day, group, hour in zip(*np.nonzero(booked | paid))
+    ]
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def rollup_month(month: date) -> list[UsageRollupMonth]:
+    """Monthly rollup rows of the month starting on ``month``."""
+    return [
+        UsageRollupMonth(month=month, **row)
+        for row in _totals(
+            UsageRollup.objects.filter(
+                day__gte=month, day__lt=next_month(month)
+            )
+        )
+    ]
+
+
+def _totals(rollups):
+    return rollups.values("complex_id", "activity", "hour").annotate(
+        booked=Sum("booked"), paid=Sum("paid"), revenue=Sum("revenue")
+    ).order_by()
+
+
+def usage_report(
+        date_from: date,
+        date_to: date,
+        complex_id: Optional[int] = None,
+        activity: Optional[str] = None
+) -> dict:
+    """Occupancy and revenue between two days by complex, activity and hour.
+
+    Capacity counts the slots of the current fields and schedules of
+    every complex by the hour they start in.
+    """
+    key = (
+        date_from,
+        date_to,
+        complex_id,
+        activity,
+        counters.read([counters.ROLLUP_KEY, counters.CATALOGUE_KEY]),
+    )
+    with _lock:
+        report = _reports.get(key)
+    if report is None:
+        report = _build_report(date_from, date_to, complex_id, activity)
+        with _lock:
+            _reports[key] = report
+    return report
+
+
+def _build_report(date_from, date_to, complex_id, activity) -> dict:
+    catalogue = get_catalogue()
+    complexes = [
+        item for item in catalogue.complexes
+        if complex_id is None or item["id"] == complex_id
+    ]
+    complex_index = {item["id"]: n for n, item in enumerate(complexes)}
+    activities = [activity] if activity else ACTIVITIES
+    activity_index = {name: n for n, name in enumerate(activities)}
+
+    # Fields per complex and activity, the slots of a single hour of a day.
+    fields = np.zeros((len(complexes), len(activities)), dtype=np.int64)
+    for field in catalogue.fields:
+        if field["complex"] in complex_index \
+                and field["activity"] in activity_index:
+            fields[
+                complex_index[field["complex"]],
+                activity_index[field["activity"]]
+            ] += 1
+    days_count = (date_to - date_from).days + 1
+    slots_per_hour = np.zeros(
+        (len(complexes), HOURS_PER_DAY), dtype=np.int64
+    )
+    for n, item in enumerate(complexes):
+        for value in catalogue.schedules[item["id"]].times():
+            slots_per_hour[n, value.hour] += 1
+
+    # Whole months come from the monthly rollups, the days before the
+    # first and after the last of them from the daily ones.
+    first_month = date_from if date_from.day == 1 else next_month(date_from)
+    end_month = month_start(date_to + timedelta(days=1))
+    if first_month < end_month:
+        months = UsageRollupMonth.objects.filter(
+            month__gte=first_month, month__lt=end_month
+        )
+        days = UsageRollup.objects.filter(
+            Q(day__gte=date_from, day__lt=first_month)
+            | Q(day__gte=end_month, day__lte=date_to)
+        )
+    else:
+        months = UsageRollupMonth.objects.none()
+        days = UsageRollup.objects.filter(day__range=(date_from, date_to))
+
+    rows = []
+    for rollups in (months, days):
+        if complex_id is not None:
+            rollups = rollups.filter(complex_id=complex_id)
+        if activity:
+            rollups = rollups.filter(activity=activity)
+        rows += [
+            (
+                complex_index[row["complex_id"]],
+                activity_index[row["activity"]],
+                row["hour"],
+                row["booked"],
+                row["paid"],
+                row["revenue"],
+            )
+            for row in _totals(rollups)
+            if row["complex_id"] in complex_index
+            and row["activity"] in activity_index
+        ]
+    grid = np.zeros(
+        (len(complexes), len(activities), HOURS_PER_DAY, 3), dtype=np.int64
+    )
+    if rows:
+        complex_of, activity_of, hour_of, *values = np.array(
+            rows, dtype=np.int64
+        ).T
+        np.add.at(
+            grid, (complex_of, activity_of, hour_of), np.stack(values, axis=1)
+        )
+    capacity = fields[:, :, None] * days_count * slots_per_hour[:, None, :]
+
+    def breakdown(axes, labels):
+        totals = grid.sum(axis=axes)
+        slots = capacity.sum(axis=axes)
+        return [
+            {**label, **_usage(totals[n], slots[n])}
+            for n, label in enumerate(labels)
+        ]
+
+    return {
+        "from": date_from,
+        "to": date_to,
+        "days": days_count,
+        "total": _usage(grid.sum(axis=(0, 1, 2)), capacity.sum()),
+        "by_complex": breakdown(
+            (1, 2),
+            [{"complex": item["id"], "name": item["name"]}
+             for item in complexes]
+        ),
+        "by_activity": breakdown(
+            (0, 2), [{"activity": name} for name in activities]
+        ),
+        "by_hour": [
+            usage for usage in breakdown(
+                (0, 1),
+                [{"hour": f"{hour:02d}:00"} for hour in range(HOURS_PER_DAY)]
+            )
+            # Hours no complex is open in.
+            if usage["capacity"] or usage["booked"]
+        ],
+    }
+
+
+def _usage(totals, capacity) -> dict:
+    booked, paid, revenue = (int(value) for value in totals)
+    capacity = int(capacity)
+    return {
+        "booked": booked,
+        "capacity": capacity,
+        "occupancy": round(booked / capacity, 4) if capacity else None,
+        "paid": paid,
+        "revenue": f"{revenue / 100:.2f}",
+    }
@@ -0,0 +1,231 @@
+"""Archive of bookings older than ``BOOKING_ARCHIVE_DAYS``.
+
+The ``archive_bookings`` command moves old bookings to ``ArchivedBooking``
+a batch at a time, every batch in its own short transaction, so a stopped
+run simply continues with the oldest day left. Paid payments move with
+their bookings into ``ArchivedPayment`` once every booking they cover is
+old enough. A payment that is still pending, or that also covers a newer
+booking, keeps itself and all of its bookings in place; a pending one may
+still be paid through its webhook or ``reconcile_payments``.
+
+Occupancy rows of archived days stay, ``rebuild_occupancy`` counts the
+archived bookings too, so availability and usage rollups of those days
+do not change. Reads of a date range that starts before
+``archive_horizon()`` add the archived rows, later ranges never touch the
+archive tables.
+"""
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import date
+from typing import Iterator, Optional
+
+from django.db import transaction
+from django.db.models import Prefetch, QuerySet
+
+from service.models import (
+    ArchivedBooking,
+    ArchivedPayment,
+    ArchivedPaymentLine,
+    Booking,
+    Payment,
+    PaymentLine,
+    archive_horizon,
+)
+from service.slots import day_keys
+
+# Stays below the 999 parameters of older SQLite builds in ``id IN (...)``.
+ARCHIVE_BATCH_SIZE = 500
+# Attribute of prefetched archived bookings, see archived_prefetch.
+ARCHIVED_ATTR = "archived_window_bookings"
+
+_moving = ContextVar("moving_bookings", default=False)
+
+
+def moving_bookings() -> bool:
+    """Whether bookings are being deleted on their way to the archive.
+
+    Their slots stay occupied, every read of their days gets the same
+    rows from the archive tables.
+    """
+    return _moving.get()
+
+
+def needs_archive(date_from: Optional[date]) -> bool:
+    """Whether bookings from ``date_from`` on may be archived ones."""
+    return date_from is None or date_from < archive_horizon()
+
+
+def with_archived(
+        bookings: QuerySet,
+        archived: QuerySet,
+        date_from: Optional[date]
+) -> QuerySet:
+    """``bookings`` and ``archived`` in one union if ``date_from`` needs it.
+
+    Both querysets select whole rows or the same values. Order the result
+    after the union.
+    """
+    if not needs_archive(date_from):
+        return bookings
+    return bookings.union(archived, all=True)
+
+
+def archived_prefetch(
+        lookup: str,
+        date_from: date,
+        date_to: date
+) -> list[Prefetch]:
+    """Prefetch of the archived bookings of fields in a date range.
+
+    ``lookup`` leads to the fields' ``archived_bookings``, the bookings
+    end up in their ``ARCHIVED_ATTR`` list. Empty when the range needs no
+    archived rows.
+    """
+    if not needs_archive(date_from):
+        return []
+    return [
+        Prefetch(
+            lookup,
+            queryset=ArchivedBooking.objects.filter(
+                slot__range=day_keys(date_from, date_to)
+            ).order_by("slot"),
+            to_attr=ARCHIVED_ATTR
+        )
+    ]
+
+
+def archive_before(
+        before: date,
+        batch_size: int = ARCHIVE_BATCH_SIZE
+) -> Iterator[tuple[date, int, int]]:
+    """Archive the bookings of every day before ``before``.
+
+    Yields the day and the numbers of archived bookings and payments of
+    every batch.
+    """
+    days = Booking.objects.filter(day__lt=before).order_by("day").values_list(
+        "day", flat=True
+    )
+    day = days.first()
+    while day is not None:
+        after_id = 0
+        while True:
+            last_id, bookings, payments = archive_batch(
+                day, after_id, before, batch_size
+            )
+            if last_id is None:
+                break
+            after_id = last_id
+            yield day, bookings, payments
+        day = days.filter(day__gt=day).first()
+
+
+def archive_batch(
+        day: date,
+        after_id: int,
+        before: date,
+        batch_size: int
+) -> tuple[Optional[int], int, int]:
+    """Archive up to ``batch_size`` bookings of ``day`` after ``after_id``.
+
+    Returns the last booking id looked at, None once the day is done, and
+    the numbers of archived bookings and payments.
+    """
+    with transaction.atomic():
+        ids = list(
+            Booking.objects.select_for_update().filter(
+                day=day, id__gt=after_id
+            ).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return None, 0, 0
+        booking_ids, payment_ids = _movable(ids, before)
+        if booking_ids:
+            _move(booking_ids, payment_ids)
+    return ids[-1], len(booking_ids), len(payment_ids)
+
+
+def _movable(ids: list[int], before: date) -> tuple[set, set]:
+    """Bookings and payments connected to ``ids`` that can move together.
+
+    A payment pulls in its other bookings, those pull in their other
+    payments and so on. Everything connected to a booking on or after
+    ``before`` or to a pending payment stays.
+    """
+    bookings, payments = set(ids), set()
+    links = defaultdict(set)
+    new_bookings = set(ids)
+    while new_bookings:
+        lines = set(
+            PaymentLine.objects.filter(
+                booking_id__in=new_bookings
+            ).values_list("payment_id", "booking_id")
+        )
+        new_payments = {payment for payment, _ in lines} - payments
+        payments |= new_payments
+        lines |= set(
+            PaymentLine.objects.filter(
+                payment_id__in=new_payments
+            ).values_list("payment_id", "booking_id")
+        )
+        for payment, booking in lines:
+            links["p", payment].add(("b", booking))
+            links["b", booking].add(("p", payment))
+        new_bookings = {booking for _, booking in lines} - bookings
+        bookings |= new_bookings
+
+    # Lock the pulled in newer bookings and the pending payments, which
+    # keep everything connected to them in place.
+    newer = Booking.objects.select_for_update().filter(
+        id__in=bookings - set(ids), day__gte=before
+    ).values_list("id", flat=True)
+    pending = Payment.objects.select_for_update().filter(
+        id__in=payments
+    ).exclude(
+        status=Payment.PaymentStatus.PAID
+    ).values_list("id", flat=True)
+    stuck = [("b", booking) for booking in newer]
+    stuck += [("p", payment) for payment in pending]
+    kept = set(stuck)
+    while stuck:
+        for node in links[stuck.pop()] - kept:
+            kept.add(node)
+            stuck.append(node)
+    return (
+        {booking for booking in bookings if ("b", booking) not in kept},
+        {payment for payment in payments if ("p", payment) not in kept},
+    )
+
+
+def _columns(model) -> list[str]:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _move(booking_ids: set, payment_ids: set) -> None:
+    ArchivedBooking.objects.bulk_create(
+        ArchivedBooking(**row)
+        for row in Booking.objects.filter(id__in=booking_ids).values(
+            *_columns(ArchivedBooking)
+        )
+    )
+    if payment_ids:
+        ArchivedPayment.objects.bulk_create(
+            ArchivedPayment(**row)
+            for row in Payment.objects.filter(id__in=payment_ids).values(
+                *_columns(ArchivedPayment)
+            )
+        )
+        lines = PaymentLine.objects.filter(payment_id__in=payment_ids)
+        ArchivedPaymentLine.objects.bulk_create(
+            ArchivedPaymentLine(**row)
+            for row in lines.values(*_columns(ArchivedPaymentLine))
+        )
+        lines.delete()
+        Payment.objects.filter(id__in=payment_ids).delete()
+    # The post_delete signal leaves their slots occupied, see
+    # moving_bookings. Their payment lines are already gone.
+    token = _moving.set(True)
+    try:
+        Booking.objects.filter(id__in=booking_ids).delete()
+    finally:
+        _moving.reset(token)
@@ -0,0 +1,70 @@
+from datetime import date, time
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from service import occupancy
+from service.exceptions import BookingConflict
+from service.models import Booking, SportsField
+from service.slots import slot_key, Schedule
+
+
+def check_slots(schedule: Schedule, slots: list[tuple[date, time]]) -> None:
+    """Reject times that do not start a slot of ``schedule``."""
+    invalid = sorted({
+        value for _, value in slots if schedule.slot(value) is None
+    })
+    if invalid:
+        raise ValidationError({
+            "time": (
+                f"{', '.join(f'{value:%H:%M}' for value in invalid)} "
+                f"must be one of {', '.join(schedule.labels())}."
+            )
+        })
+
+
+def find_conflicts(
+        field: SportsField,
+        slots: list[tuple[date, time]]
+) -> list[tuple[date, time]]:
+    """Return the already booked slots among ``slots`` in one query."""
+    booked = set(
+        Booking.objects.filter(
+            field=field,
+            slot__in={slot_key(day, value) for day, value in slots},
+        ).values_list("slot", flat=True)
+    )
+    return [slot for slot in slots if slot_key(*slot) in booked]
+
+
+def book_slots(
+        field: SportsField,
+        personal_data,
+        slots: list[tuple[date, time]]
+) -> list[Booking]:
+    """Book every slot of ``slots`` or none of them.
+
+    The insert relies on the ``unique_booking_slot`` constraint instead of
+    a read before it, so concurrent requests for the same slot never wait
+    on each other beyond the insert itself. The loser gets
+    ``BookingConflict`` listing the slots that are already taken.
+    """
+    slots = list(dict.fromkeys(slots))
+    schedule = occupancy.field_schedule(field)
+    check_slots(schedule, slots)
+    try:
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    field=field,
+                    day=day,
+                    time=value,
+                    slot=slot_key(day, value),
+                    personal_data=personal_data
+                )
+                for day, value in slots
+            ])
+            occupancy.occupy(field.id, occupancy.day_masks(schedule, slots))
+    except IntegrityError:
+        raise BookingConflict(find_conflicts(field, slots) or slots)
+    return bookings
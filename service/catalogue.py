@@ -0,0 +1,165 @@
+"""Cached, serialized catalogue of sports complexes and fields.
+
+Complexes and fields change rarely but are read by every search and field
+listing. The whole catalogue is serialized once per version and kept in
+an in-process TTL/LRU cache. The version is the ``catalogue`` change
+counter, which every change bumps in its own transaction. A process reads
+it at most once per ``CATALOGUE_VERSION_TTL`` seconds, and at once after
+a change of its own commits, so other workers see a change that much
+later and a steady read runs no query. With ``CATALOGUE_CACHE`` naming a
+shared Django cache, workers also share a built copy of every version.
+``CATALOGUE_CACHE_TTL`` bounds how stale a copy can get when a change
+bypasses the signals, e.g. ``QuerySet.update``.
+"""
+import hashlib
+import json
+import time as timer
+from threading import Lock
+from typing import NamedTuple, Optional
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from service import counters
+from service.models import SportsComplex, SportsField
+from service.serializers import SportsComplexSerializer, SportsFieldSerializer
+
+DATA_KEY = "catalogue:data:{version}"
+
+
+class Catalogue(NamedTuple):
+    complexes: list
+    complexes_by_id: dict
+    fields: list
+    fields_by_id: dict
+    # Schedule of every complex by id.
+    schedules: dict
+    # Hash of the content, the validator of responses built from it.
+    digest: str
+
+
+_local = TTLCache(maxsize=4, ttl=settings.CATALOGUE_CACHE_TTL)
+# Last version read and when, see version().
+_version: Optional[tuple[int, float]] = None
+_lock = Lock()
+
+
+def _shared():
+    if settings.CATALOGUE_CACHE:
+        return caches[settings.CATALOGUE_CACHE]
+    return None
+
+
+def version() -> int:
+    global _version
+    now = timer.monotonic()
+    with _lock:
+        if _version is not None \
+                and now - _version[1] < settings.CATALOGUE_VERSION_TTL:
+            return _version[0]
+    current = counters.read([counters.CATALOGUE_KEY])[0]
+    with _lock:
+        _version = current, now
+    return current
+
+
+def forget_version() -> None:
+    global _version
+    with _lock:
+        _version = None
+
+
+def invalidate() -> None:
+    """Move the catalogue to a new version in the current transaction.
+
+    The same counter validates every cached search. This process reads
+    the new version as soon as the change commits.
+    """
+    counters.bump([counters.CATALOGUE_KEY])
+    transaction.on_commit(forget_version)
+
+
+def clear() -> None:
+    forget_version()
+    with _lock:
+        _local.clear()
+
+
+def _build() -> Catalogue:
+    instances = list(
+        SportsComplex.objects.prefetch_related("fields").order_by("id")
+    )
+    complexes = SportsComplexSerializer(instances, many=True).data
+    fields = SportsFieldSerializer(
+        SportsField.objects.order_by("id"), many=True
+    ).data
+    fields = [dict(field) for field in fields]
+    complexes = [
+        {**item, "fields": [dict(field) for field in item["fields"]]}
+        for item in complexes
+    ]
+    digest = hashlib.sha1(
+        json.dumps([complexes, fields], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return Catalogue(
+        complexes=complexes,
+        complexes_by_id={item["id"]: item for item in complexes},
+        fields=fields,
+        fields_by_id={field["id"]: field for field in fields},
+        schedules={item.id: item.schedule for item in instances},
+        digest=digest,
+    )
+
+
+def get_catalogue() -> Catalogue:
+    current = version()
+    with _lock:
+        catalogue = _local.get(current)
+    if catalogue is not None:
+        return catalogue
+
+    shared = _shared()
+    key = DATA_KEY.format(version=current)
+    catalogue = shared.get(key) if shared is not None else None
+    if catalogue is None:
+        catalogue = _build()
+        # A transaction that rolls back takes its version back, a copy
+        # built inside it must not outlive it under that version.
+        if shared is not None \
+                and not transaction.get_connection().in_atomic_block:
+            shared.set(key, catalogue, timeout=settings.CATALOGUE_CACHE_TTL)
+    with _lock:
+        _local[current] = catalogue
+    return catalogue
+
+
+def search_complexes(
+        catalogue: Catalogue, activity=None, location=None
+) -> list:
+    """Complexes with a field, of ``activity`` if given, in ``location``."""
+    activity = activity and activity.lower()
+    location = location and location.lower()
+    return [
+        item for item in catalogue.complexes
+        if (not location or item["location"].lower() == location)
+        and any(
+            not activity or field["activity"].lower() == activity
+            for field in item["fields"]
+        )
+    ]
+
+
+def complexes_with_ids(catalogue: Catalogue, ids: list[int]) -> list:
+    complexes_by_id = catalogue.complexes_by_id
+    return [complexes_by_id[pk] for pk in ids if pk in complexes_by_id]
+
+
+def with_absolute_images(request, complexes: list) -> list:
+    """Turn the cached relative image paths into absolute URLs."""
+    return [
+        {**item, "image": request.build_absolute_uri(item["image"])}
+        if item["image"] else item
+        for item in complexes
+    ]
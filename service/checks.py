@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.security)
+def check_stripe_webhook_secret(app_configs, **kwargs):
+    if settings.STRIPE_STUB or settings.STRIPE_WEBHOOK_SECRET:
+        return []
+    return [
+        Warning(
+            "STRIPE_WEBHOOK_SECRET is not set.",
+            hint="The Stripe webhook rejects every event without it, so "
+                 "payments are only marked paid by reconcile_payments.",
+            id="service.W001",
+        )
+    ]
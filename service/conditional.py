@@ -0,0 +1,47 @@
+"""ETag based conditional GET for viewset actions.
+
+Validators are derived from what a response is built from, the catalogue
+digest and change counters (``service.counters``), never from the
+rendered body. A matching ``If-None-Match`` is answered with 304 before
+the view queries or serializes anything.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+def make_etag(request, *parts) -> str:
+    """ETag of the response to ``request`` built from ``parts``.
+
+    The absolute URL is included, as responses depend on the query
+    string and contain absolute links.
+    """
+    digest = hashlib.sha1(request.build_absolute_uri().encode())
+    for part in parts:
+        digest.update(b"\0" + repr(part).encode())
+    return quote_etag(digest.hexdigest())
+
+
+def conditional(etag_func):
+    """Answer GETs whose ``If-None-Match`` matches ``etag_func``.
+
+    ``etag_func`` takes the view arguments and returns the ETag of the
+    current response, or None when it cannot tell cheaply.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            etag = etag_func(self, request, *args, **kwargs)
+            if etag is None:
+                return view(self, request, *args, **kwargs)
+
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response["ETag"] = etag
+            return response
+        return wrapper
+    return decorator
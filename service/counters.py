@@ -0,0 +1,90 @@
+"""Change counters that validate cached results across processes.
+
+A writer bumps the counters covering what it changed in its own
+transaction, so they move exactly when the change commits. A reader
+fetches the counters first and uses them as part of its cache key; a
+result computed from older data is stored under older counters and is
+never served once the change is visible.
+
+Bookings and payments count their changes on the ``FieldOccupancy`` row
+of every field day they touch, a row the booking writes anyway. Readers
+add up the versions of the field days they cover, so no two bookings of
+different fields share a counter row.
+"""
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db.models import Count, F, Sum
+
+from service import occupancy
+from service.models import ChangeCounter, FieldOccupancy, PaymentLine
+
+CATALOGUE_KEY = "catalogue"
+FAQ_KEY = "faq"
+# Bumped by rollup_usage after it wrote new rollups.
+ROLLUP_KEY = "rollup"
+
+
+def read(keys: Iterable[str]) -> tuple:
+    """Current values of ``keys`` in one query, in the order given."""
+    keys = list(keys)
+    values = dict(
+        ChangeCounter.objects.filter(key__in=keys).values_list("key", "value")
+    )
+    return tuple(values.get(key, 0) for key in keys)
+
+
+def bump(keys: Iterable[str]) -> None:
+    """Increment ``keys``. Call inside the transaction of the change."""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    counters = ChangeCounter.objects.filter(key__in=keys)
+    if counters.update(value=F("value") + 1) == len(keys):
+        return
+    # Create the missing rows at 0 and bump again. A concurrent creator
+    # makes the insert wait and be ignored, the update after it still
+    # counts this change. Counters only have to move, so bumping the
+    # existing ones twice is harmless.
+    ChangeCounter.objects.bulk_create(
+        [ChangeCounter(key=key, value=0) for key in keys],
+        ignore_conflicts=True
+    )
+    counters.update(value=F("value") + 1)
+
+
+def bookings_version(**lookups) -> tuple[int, int]:
+    """Version of the bookings and payments on the field days matching
+    ``lookups``.
+
+    Field day versions only grow and their rows are only deleted with
+    their field, so the sum and number of the versions never repeat
+    across a change.
+    """
+    totals = FieldOccupancy.objects.filter(**lookups).aggregate(
+        total=Sum("version"), rows=Count("id")
+    )
+    return totals["total"] or 0, totals["rows"]
+
+
+def search_version(location: Optional[str], day: date) -> tuple[int, int]:
+    """Version of the bookings a search of ``location`` (any when empty)
+    on ``day`` reads."""
+    if location:
+        return bookings_version(
+            day=day, field__complex__location__iexact=location
+        )
+    return bookings_version(day=day)
+
+
+def bump_paid(payments) -> None:
+    """Record newly paid ``payments`` on the field days they booked.
+
+    Marks the days for ``rollup_usage``. ``payments`` is a queryset or a
+    list of payments or their ids.
+    """
+    occupancy.touch(
+        PaymentLine.objects.filter(payment__in=payments).values_list(
+            "booking__field_id", "booking__day"
+        ).distinct()
+    )
@@ -0,0 +1,17 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested slots are already booked."
+    default_code = "booking_conflict"
+
+    def __init__(self, conflicts, detail=None):
+        super().__init__({
+            "detail": detail or self.default_detail,
+            "conflicts": [
+                {"day": day.isoformat(), "time": time.isoformat()}
+                for day, time in conflicts
+            ],
+        })
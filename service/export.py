@@ -0,0 +1,207 @@
+"""Streaming export of bookings and payments for staff.
+
+Rows are read as tuples through a chunked cursor, server side on
+PostgreSQL, and rendered in batches as they arrive. Memory use does not
+depend on the number of exported rows. Archived rows come first when the
+date range needs them.
+"""
+import csv
+import io
+from datetime import date, datetime
+from itertools import chain
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+from service.archive import needs_archive
+from service.models import (
+    ArchivedBooking,
+    ArchivedPaymentLine,
+    Booking,
+    PaymentLine,
+)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+BOOKING_COLUMNS = {
+    "id": "id",
+    "day": "day",
+    "time": "time",
+    "created_at": "created_at",
+    "field": "field_id",
+    "activity": "field__activity",
+    "price": "field__price",
+    "complex": "field__complex_id",
+    "complex_name": "field__complex__name",
+    "location": "field__complex__location",
+    "user": "personal_data_id",
+    "email": "personal_data__email",
+}
+
+# One row per paid booking, payments of several bookings span several rows.
+PAYMENT_COLUMNS = {
+    "payment": "payment_id",
+    "status": "payment__status",
+    "money_to_pay": "payment__money_to_pay",
+    "session_id": "payment__session_id",
+    "booking": "booking_id",
+    "unit_amount": "unit_amount",
+    "day": "booking__day",
+    "time": "booking__time",
+    "field": "booking__field_id",
+    "activity": "booking__field__activity",
+    "complex": "booking__field__complex_id",
+    "complex_name": "booking__field__complex__name",
+    "user": "booking__personal_data_id",
+    "email": "booking__personal_data__email",
+}
+
+
+class ExportFilters(NamedTuple):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    complex_id: Optional[int] = None
+
+
+def get_export_filters(query_params) -> ExportFilters:
+    """Read the optional ``from``, ``to`` and ``complex`` parameters."""
+    values = {}
+    for name in ("from", "to"):
+        value = query_params.get(name)
+        if not value:
+            continue
+        try:
+            values[name] = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValidationError({name: "Date must be in YYYY-MM-DD format."})
+
+    complex_id = query_params.get("complex")
+    if complex_id:
+        try:
+            complex_id = int(complex_id)
+        except ValueError:
+            raise ValidationError({"complex": "Must be a complex id."})
+
+    filters = ExportFilters(
+        values.get("from"), values.get("to"), complex_id or None
+    )
+    if filters.date_from and filters.date_to \
+            and filters.date_to < filters.date_from:
+        raise ValidationError({"to": "Must not be earlier than 'from'."})
+    return filters
+
+
+def booking_rows(filters: ExportFilters) -> list[QuerySet]:
+    return [
+        _filtered(
+            model.objects.all(), "", filters
+        ).order_by("id").values_list(*BOOKING_COLUMNS.values())
+        for model in _models(ArchivedBooking, Booking, filters)
+    ]
+
+
+def payment_rows(filters: ExportFilters) -> list[QuerySet]:
+    return [
+        _filtered(
+            model.objects.all(), "booking__", filters
+        ).order_by("payment_id", "id").values_list(*PAYMENT_COLUMNS.values())
+        for model in _models(ArchivedPaymentLine, PaymentLine, filters)
+    ]
+
+
+def _models(archived, live, filters: ExportFilters) -> list:
+    return [archived, live] if needs_archive(filters.date_from) else [live]
+
+
+def _filtered(queryset, prefix: str, filters: ExportFilters) -> QuerySet:
+    if filters.date_from:
+        queryset = queryset.filter(**{f"{prefix}day__gte": filters.date_from})
+    if filters.date_to:
+        queryset = queryset.filter(**{f"{prefix}day__lte": filters.date_to})
+    if filters.complex_id:
+        queryset = queryset.filter(
+            **{f"{prefix}field__complex_id": filters.complex_id}
+        )
+    return queryset
+
+
+def raw_rows(queryset: QuerySet, chunk_size: int) -> Iterator[tuple]:
+    """Rows of ``queryset`` as the database driver returns them.
+
+    Unlike ``QuerySet.iterator`` this skips the per value converters of
+    Django, which cost more than rendering and only build objects that are
+    turned back into text.
+    """
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(chunk_size):
+            yield from rows
+
+
+def render(
+        rows: list[QuerySet],
+        columns: Iterable[str],
+        export_format: str,
+        chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """Yield the rows of the querysets ``rows`` one after the other as CSV
+    or NDJSON text, ``chunk_size`` rows at a time."""
+    columns = list(columns)
+    buffer = io.StringIO()
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = writer.writerows
+    else:
+        encode = DjangoJSONEncoder(separators=(",", ":")).encode
+
+        def write(chunk):
+            buffer.writelines(
+                encode(dict(zip(columns, row))) + "\n" for row in chunk
+            )
+
+    chunk = []
+    for row in chain.from_iterable(
+            raw_rows(part, chunk_size) for part in rows
+    ):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            write(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            chunk = []
+    write(chunk)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+        request,
+        name: str,
+        rows: list[QuerySet],
+        columns: Iterable[str]
+) -> StreamingHttpResponse:
+    """Stream ``rows`` in the format of the ``type`` query parameter."""
+    export_format = request.query_params.get("type", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError(
+            {"type": f"Must be one of: {', '.join(EXPORT_FORMATS)}."}
+        )
+    response = StreamingHttpResponse(
+        render(rows, columns, export_format),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}.{export_format}"'
+    )
+    return response
@@ -0,0 +1,145 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+from service.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name=IDEMPOTENCY_KEY_HEADER,
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    description=(
+        "Unique key of the request. A retry with the same key returns "
+        "the stored response instead of running the request again"
+    ),
+)
+
+
+def request_hash(request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def idempotent(view):
+    """Make a POST view replay its response for a repeated key.
+
+    A replay is a single read. A new key is claimed with an insert before
+    the view runs, so of many concurrent requests with one key only the
+    first does the work; the others get 409 until it finishes and a
+    replay of its response after. Only successful responses are stored, a
+    failed request releases the key so it can be retried. A claim expires
+    after ``IDEMPOTENCY_KEY_LEASE``, so a worker that died mid-request
+    locks the key only that long; a stored response lasts
+    ``IDEMPOTENCY_KEY_TTL``. An expired key is taken over by the next
+    request with it, ``purge_idempotency_keys`` deletes the others.
+    """
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not key:
+            return view(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_KEY_HEADER} is too long."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = request_hash(request)
+        claim = claim_key(request.user, key, fingerprint)
+        if isinstance(claim, Response):
+            return claim
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except Exception:
+            claim.delete()
+            raise
+        if not status.is_success(response.status_code):
+            claim.delete()
+            return response
+
+        # Nothing is updated when the lease ran out and a retry already
+        # took the key over.
+        claim.update(
+            status_code=response.status_code,
+            response_body=response.data,
+            expires_at=timezone.now() + settings.IDEMPOTENCY_KEY_TTL
+        )
+        return response
+
+    return wrapper
+
+
+def claim_key(user, key, fingerprint):
+    """Claim ``key`` for a new request or answer from its record.
+
+    Returns a queryset of the claimed row, or the response of a replay,
+    a conflict or a mismatch.
+    """
+    now = timezone.now()
+    lease = now + settings.IDEMPOTENCY_KEY_LEASE
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    request_hash=fingerprint,
+                    expires_at=lease
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        else:
+            return IdempotencyKey.objects.filter(
+                pk=record.pk, expires_at=lease
+            )
+
+    if record is not None and record.expires_at <= now:
+        # Of several requests taking over an expired key the first
+        # update wins, the others see the new lease.
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, expires_at__lte=now
+        ).update(
+            request_hash=fingerprint,
+            status_code=None,
+            response_body=None,
+            created_at=now,
+            expires_at=lease
+        )
+        if taken:
+            return IdempotencyKey.objects.filter(
+                pk=record.pk, expires_at=lease
+            )
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+    return replay(record, fingerprint)
+
+
+def replay(record, fingerprint):
+    if record is not None and record.request_hash != fingerprint:
+        return Response(
+            {"detail": "This key was used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record is None or record.status_code is None:
+        return Response(
+            {"detail": "A request with this key is still in progress."},
+            status=status.HTTP_409_CONFLICT
+        )
+    return Response(
+        record.response_body,
+        status=record.status_code,
+        headers={"Idempotent-Replayed": "true"}
+    )
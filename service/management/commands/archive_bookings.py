@@ -0,0 +1,60 @@
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from service.archive import archive_before, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Move bookings older than BOOKING_ARCHIVE_DAYS, with the payments "
+        "that only cover such bookings, to the archive tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.BOOKING_ARCHIVE_DAYS,
+            help="Archive bookings older than this, at least "
+                 "BOOKING_ARCHIVE_DAYS",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="Bookings moved in one transaction",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < settings.BOOKING_ARCHIVE_DAYS:
+            raise CommandError(
+                "Reads only look into the archive for days older than "
+                f"BOOKING_ARCHIVE_DAYS={settings.BOOKING_ARCHIVE_DAYS}."
+            )
+        before = date.today() - timedelta(days=options["days"])
+        start = time.monotonic()
+        bookings = payments = 0
+        current = None
+        for day, moved, moved_payments in archive_before(
+                before, options["batch_size"]
+        ):
+            if day != current and current is not None:
+                self.stdout.write(f"{current}: {bookings} bookings so far")
+            current = day
+            bookings += moved
+            payments += moved_payments
+            if options["pause"]:
+                time.sleep(options["pause"])
+        self.stdout.write(
+            f"archived {bookings} bookings and {payments} payments before "
+            f"{before}, elapsed {time.monotonic() - start:.2f}s"
+        )
@@ -0,0 +1,98 @@
+import time as timer
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from service.bookings import book_slots
+from service.models import (
+    Booking,
+    SportsComplex,
+    SportsField,
+)
+from service.slots import DEFAULT_SCHEDULE
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-slot inserts with the bulk booking path. "
+        "Everything is written in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1, 10, 50, 100, 200, 500],
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'slots':>6} {'per-slot ms':>12} {'queries':>8} "
+            f"{'bulk ms':>9} {'queries':>8}"
+        )
+        try:
+            with transaction.atomic():
+                for size in options["sizes"]:
+                    self.run_size(size, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run_size(self, size, repeat):
+        times = DEFAULT_SCHEDULE.times()
+        slots = [
+            (date(2100, 1, 1) + timedelta(days=n // len(times)),
+             times[n % len(times)])
+            for n in range(size)
+        ]
+        user = get_user_model().objects.create_user(
+            f"bench-{size}@example.com"
+        )
+        sports_complex = SportsComplex.objects.create(
+            name=f"Bench {size}",
+            address=f"Bench street {size}",
+            phone="+380441234567",
+        )
+
+        results = []
+        for path in (self.per_slot, book_slots):
+            elapsed = queries = 0
+            for _ in range(repeat):
+                field = SportsField.objects.create(
+                    complex=sports_complex, price=10
+                )
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as context:
+                    start = timer.perf_counter()
+                    path(field, user, slots)
+                    elapsed += timer.perf_counter() - start
+                queries = len(context.captured_queries)
+            results.append((elapsed / repeat * 1000, queries))
+
+        (slow_ms, slow_queries), (bulk_ms, bulk_queries) = results
+        self.stdout.write(
+            f"{size:>6} {slow_ms:>12.1f} {slow_queries:>8} "
+            f"{bulk_ms:>9.1f} {bulk_queries:>8}"
+        )
+
+    @staticmethod
+    def per_slot(field, personal_data, slots):
+        with transaction.atomic():
+            return [
+                Booking.objects.create(
+                    field=field,
+                    day=day,
+                    time=value,
+                    personal_data=personal_data
+                )
+                for day, value in slots
+            ]
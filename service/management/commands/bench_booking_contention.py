@@ -0,0 +1,105 @@
+import threading
+import time as timer
+from collections import Counter
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from service.bookings import book_slots
+from service.exceptions import BookingConflict
+from service.models import (
+    Booking,
+    SportsComplex,
+    SportsField,
+)
+from service.slots import DEFAULT_SCHEDULE
+
+
+class Command(BaseCommand):
+    help = (
+        "Race threads for the same booking slots and check that every slot "
+        "has exactly one winner. Creates a temporary complex and users "
+        "and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--slots", type=int, default=50)
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        times = DEFAULT_SCHEDULE.times()
+        slots = [
+            (date(2100, 1, 1) + timedelta(days=n // len(times)),
+             times[n % len(times)])
+            for n in range(options["slots"])
+        ]
+
+        sports_complex = SportsComplex.objects.create(
+            name="Contention benchmark",
+            address="Contention benchmark",
+            phone="+380441234567",
+        )
+        field = SportsField.objects.create(complex=sports_complex, price=10)
+        users = [
+            get_user_model().objects.create_user(f"contention-{n}@example.com")
+            for n in range(threads)
+        ]
+        outcomes = Counter()
+        winners = Counter()
+        barrier = threading.Barrier(threads)
+        lock = threading.Lock()
+
+        def claim(user):
+            try:
+                for slot in slots:
+                    barrier.wait()
+                    try:
+                        book_slots(field, user, [slot])
+                        outcome = "won"
+                    except BookingConflict:
+                        outcome = "conflict"
+                    except Exception:
+                        outcome = "error"
+                    with lock:
+                        outcomes[outcome] += 1
+                        if outcome == "won":
+                            winners[slot] += 1
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=claim, args=(user,)) for user in users
+        ]
+        try:
+            start = timer.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = timer.perf_counter() - start
+
+            stored = Booking.objects.filter(field=field).values(
+                "day", "time"
+            ).annotate(count=Count("id")).filter(count__gt=1).count()
+        finally:
+            sports_complex.delete()
+            get_user_model().objects.filter(
+                pk__in=[user.pk for user in users]
+            ).delete()
+
+        attempts = sum(outcomes.values())
+        self.stdout.write(
+            f"{threads} threads, {len(slots)} slots, {attempts} attempts "
+            f"in {elapsed:.2f}s: {attempts / elapsed:.0f} claims/sec"
+        )
+        self.stdout.write(
+            f"won {outcomes['won']}, conflicts {outcomes['conflict']}, "
+            f"errors {outcomes['error']}"
+        )
+        if stored or any(count > 1 for count in winners.values()):
+            raise CommandError("A slot was claimed more than once.")
+        self.stdout.write(self.style.SUCCESS("At most one winner per slot."))
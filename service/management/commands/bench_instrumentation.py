@@ -0,0 +1,72 @@
+import statistics
+import time as timer
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from rest_framework.views import APIView
+
+METRICS_MIDDLEWARE = "utilities.metrics.PerformanceMiddleware"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of the performance middleware "
+        "by serving the same in-process requests with and without it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--paths",
+            nargs="+",
+            default=[
+                "/api/about/faq/",
+                "/api/service/sports-complexes/",
+            ],
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--warmup", type=int, default=50)
+
+    def handle(self, *args, **options):
+        without = [
+            name for name in settings.MIDDLEWARE if name != METRICS_MIDDLEWARE
+        ]
+        with_metrics = [without[0], METRICS_MIDDLEWARE, *without[1:]]
+
+        self.stdout.write(
+            f"{'path':<40} {'off p50 us':>11} {'on p50 us':>10} "
+            f"{'overhead us':>12}"
+        )
+        for path in options["paths"]:
+            off = self.measure(path, without, options)
+            on = self.measure(path, with_metrics, options)
+            self.stdout.write(
+                f"{path:<40} {off:>11.0f} {on:>10.0f} {on - off:>12.0f}"
+            )
+
+    @staticmethod
+    def get(client, path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise CommandError(
+                f"GET {path} returned {response.status_code}, the overhead "
+                "would be measured on an error response."
+            )
+
+    def measure(self, path, middleware, options):
+        # Without throttling, which the views read from APIView at import
+        # time; the anonymous rate runs out within the warmup.
+        with patch.object(APIView, "throttle_classes", ()), \
+                override_settings(
+                    MIDDLEWARE=middleware, ALLOWED_HOSTS=["testserver"]
+                ):
+            client = Client()
+            for _ in range(options["warmup"]):
+                self.get(client, path)
+            samples = []
+            for _ in range(options["requests"]):
+                start = timer.perf_counter()
+                self.get(client, path)
+                samples.append(timer.perf_counter() - start)
+        return statistics.median(samples) * 1_000_000
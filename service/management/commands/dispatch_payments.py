@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from utilities.stripe import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = "Create Stripe checkout sessions for queued payments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=300,
+            help="Seconds before a claimed row may be retried by "
+                 "another worker",
+        )
+        parser.add_argument(
+            "--loop",
+            type=float,
+            metavar="SECONDS",
+            help="Keep running, polling every SECONDS when idle",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            results = dispatch_outbox(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+                lease=timedelta(seconds=options["lease"]),
+            )
+            if results:
+                self.stdout.write(
+                    f"done {results['done']}, failed {results['failed']}"
+                )
+            if options["loop"] is None:
+                return
+            if not results:
+                time.sleep(options["loop"])
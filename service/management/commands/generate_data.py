@@ -0,0 +1,367 @@
+import csv
+import io
+import random
+import time as timer
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from service import catalogue
+from service.models import (
+    Booking,
+    FieldOccupancy,
+    Payment,
+    PaymentLine,
+    SportsComplex,
+    SportsField,
+)
+from service.slots import DEFAULT_SCHEDULE, slot_key
+
+# Relative demand per starting hour of DEFAULT_SCHEDULE, evenings after
+# work are the peak.
+HOUR_WEIGHTS = {
+    8: 2, 9: 3, 10: 4, 11: 4, 12: 5, 13: 5, 14: 5,
+    15: 6, 16: 8, 17: 10, 18: 10, 19: 10, 20: 8, 21: 5,
+}
+WEEKEND_DEMAND = 1.3
+# Chance that the next hour is booked by the same user as the previous one.
+SAME_USER_NEXT_HOUR = 0.5
+PRICES = [Decimal(price) for price in range(10, 65, 5)]
+
+
+class Loader:
+    """Write rows with COPY on PostgreSQL, ``executemany`` elsewhere.
+
+    Rows hold values already prepared with ``db_value``, so neither path
+    builds model instances. The small tables go through ``bulk_create``.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == "postgresql"
+
+    def write(self, model, fields, rows):
+        if not rows:
+            return
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ", ".join(
+            connection.ops.quote_name(model._meta.get_field(name).column)
+            for name in fields
+        )
+        with connection.cursor() as cursor:
+            if not self.use_copy:
+                placeholders = ", ".join(["%s"] * len(fields))
+                cursor.executemany(
+                    f"INSERT INTO {table} ({columns}) "
+                    f"VALUES ({placeholders})",
+                    rows
+                )
+                return
+
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+
+
+def db_value(model, name, value):
+    return model._meta.get_field(name).get_db_prep_save(value, connection)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate reproducible synthetic complexes, fields, users, "
+        "bookings and payments for load tests and query plans"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--complexes", type=int, default=50)
+        parser.add_argument("--fields-per-complex", type=int, default=4)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--bookings", type=int, default=100_000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=120,
+            help="Number of days to spread the bookings over",
+        )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="First booking day, YYYY-MM-DD. Defaults to half of "
+                 "--days before today",
+        )
+        parser.add_argument(
+            "--paid-ratio",
+            type=float,
+            default=0.6,
+            help="Share of bookings that belong to a payment",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=50_000)
+        parser.add_argument(
+            "--prefix",
+            help="Prefix of the unique names and emails. Defaults to "
+                 "synthetic-<seed>",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.prefix = options["prefix"] or f"synthetic-{options['seed']}"
+        self.loader = Loader(options["batch_size"])
+        self.now = timezone.now()
+        start = options["start"] or (
+            date.today() - timedelta(days=options["days"] // 2)
+        )
+        self.days = [
+            start + timedelta(days=n) for n in range(options["days"])
+        ]
+
+        fields_count = options["complexes"] * options["fields_per_complex"]
+        demand = sum(
+            WEEKEND_DEMAND if day.weekday() >= 5 else 1 for day in self.days
+        ) * sum(HOUR_WEIGHTS.values()) * fields_count
+        self.scale = options["bookings"] / demand if demand else 0
+        if self.scale * max(HOUR_WEIGHTS.values()) * WEEKEND_DEMAND > 1:
+            raise CommandError(
+                "Too many bookings for the peak hours of "
+                f"{fields_count} fields over {len(self.days)} days, "
+                "add fields or days"
+            )
+
+        started = timer.monotonic()
+        with transaction.atomic():
+            users = self.create_users(options["users"])
+            fields = self.create_fields(
+                options["complexes"], options["fields_per_complex"]
+            )
+            counts = self.create_bookings(
+                fields, users, options["bookings"], options["paid_ratio"]
+            )
+            self.reset_sequences()
+            # bulk_create skips the signals that refresh the catalogue. The
+            # occupancy rows start at version 1, which marks their days for
+            # rollup_usage.
+            catalogue.invalidate()
+        elapsed = timer.monotonic() - started
+
+        self.stdout.write(
+            f"users {len(users)}, fields {len(fields)}, "
+            f"bookings {counts['bookings']}, payments {counts['payments']}, "
+            f"payment lines {counts['lines']}, "
+            f"occupancy rows {counts['occupancy']}"
+        )
+        self.stdout.write(
+            f"elapsed {elapsed:.1f}s, "
+            f"{counts['bookings'] / elapsed * 60:,.0f} bookings/min "
+            f"({'COPY' if self.loader.use_copy else 'executemany'})"
+        )
+
+    def create_users(self, count):
+        user_model = get_user_model()
+        first_id = next_id(user_model)
+        user_model.objects.bulk_create(
+            [
+                user_model(
+                    id=first_id + n,
+                    email=f"{self.prefix}-{n}@example.com",
+                    password="!",
+                )
+                for n in range(count)
+            ],
+            batch_size=self.loader.batch_size
+        )
+        return list(range(first_id, first_id + count))
+
+    def create_fields(self, complexes, fields_per_complex):
+        first_complex_id = next_id(SportsComplex)
+        SportsComplex.objects.bulk_create([
+            SportsComplex(
+                id=first_complex_id + n,
+                name=f"{self.prefix} complex {n}",
+                address=f"{self.prefix} street {n}",
+                location=self.rng.choice(SportsComplex.SportsLocation.values),
+                phone="+380441234567",
+            )
+            for n in range(complexes)
+        ], batch_size=self.loader.batch_size)
+
+        first_field_id = next_id(SportsField)
+        fields = [
+            SportsField(
+                id=first_field_id + n,
+                complex_id=first_complex_id + n // fields_per_complex,
+                activity=self.rng.choice(SportsField.SportsActivity.values),
+                price=self.rng.choice(PRICES),
+            )
+            for n in range(complexes * fields_per_complex)
+        ]
+        SportsField.objects.bulk_create(
+            fields, batch_size=self.loader.batch_size
+        )
+        return fields
+
+    def create_bookings(self, fields, users, limit, paid_ratio):
+        """Draw every slot of every field day against its peak weight.
+
+        Each slot is drawn at most once, so ``unique_booking_slot`` holds by
+        construction. Consecutive hours often go to the same user and
+        such a run is what a payment covers.
+        """
+        rng = self.rng
+        hours = [value.hour for value in DEFAULT_SCHEDULE.times()]
+        slot_times = {
+            hour: db_value(Booking, "time", time(hour)) for hour in hours
+        }
+        day_values = {
+            day: db_value(Booking, "day", day) for day in self.days
+        }
+        created_at = db_value(Booking, "created_at", self.now)
+        paid = Payment.PaymentStatus.PAID.value
+        pending = Payment.PaymentStatus.PENDING.value
+        day_chances = {
+            day: [
+                (
+                    hour,
+                    self.scale * HOUR_WEIGHTS[hour] * (
+                        WEEKEND_DEMAND if day.weekday() >= 5 else 1
+                    )
+                )
+                for hour in hours
+            ]
+            for day in self.days
+        }
+
+        booking_id = next_id(Booking)
+        payment_id = next_id(Payment)
+        line_id = next_id(PaymentLine)
+        occupancy_id = next_id(FieldOccupancy)
+        counts = dict(bookings=0, payments=0, lines=0, occupancy=0)
+        bookings, payments, lines, occupancy = [], [], [], []
+
+        def add_payment(field, run, day):
+            nonlocal payment_id, line_id
+            if rng.random() >= paid_ratio:
+                return
+            is_paid = day < self.now.date() or rng.random() < 0.5
+            unit_amount = int(field.price * 100)
+            payments.append((
+                payment_id,
+                paid if is_paid else pending,
+                f"{field.price * len(run):.2f}",
+            ))
+            for booked_id in run:
+                lines.append((line_id, payment_id, booked_id, unit_amount))
+                line_id += 1
+            payment_id += 1
+
+        for field in fields:
+            for day in self.days:
+                mask = 0
+                run, run_user = [], None
+                for hour, chance in day_chances[day]:
+                    if counts["bookings"] + len(bookings) >= limit:
+                        break
+                    if rng.random() >= chance:
+                        if run:
+                            add_payment(field, run, day)
+                            run, run_user = [], None
+                        continue
+                    if (
+                        run_user is None
+                        or rng.random() >= SAME_USER_NEXT_HOUR
+                    ):
+                        if run:
+                            add_payment(field, run, day)
+                        run, run_user = [], rng.choice(users)
+                    bookings.append((
+                        booking_id,
+                        field.id,
+                        day_values[day],
+                        slot_times[hour],
+                        slot_key(day, time(hour)),
+                        created_at,
+                        run_user,
+                    ))
+                    run.append(booking_id)
+                    booking_id += 1
+                    mask |= 1 << DEFAULT_SCHEDULE.slot(time(hour))
+                if run:
+                    add_payment(field, run, day)
+                if mask:
+                    occupancy.append(
+                        (occupancy_id, field.id, day_values[day], mask, 1)
+                    )
+                    occupancy_id += 1
+
+            if len(bookings) >= self.loader.batch_size:
+                self.flush(bookings, payments, lines, occupancy, counts)
+            if counts["bookings"] + len(bookings) >= limit:
+                break
+
+        self.flush(bookings, payments, lines, occupancy, counts)
+        return counts
+
+    def flush(self, bookings, payments, lines, occupancy, counts):
+        self.loader.write(
+            Booking,
+            [
+                "id",
+                "field_id",
+                "day",
+                "time",
+                "slot",
+                "created_at",
+                "personal_data_id",
+            ],
+            bookings
+        )
+        self.loader.write(
+            Payment, ["id", "status", "money_to_pay"], payments
+        )
+        self.loader.write(
+            PaymentLine,
+            ["id", "payment_id", "booking_id", "unit_amount"],
+            lines
+        )
+        self.loader.write(
+            FieldOccupancy,
+            ["id", "field_id", "day", "slots", "version"],
+            occupancy
+        )
+        for name, rows in (
+            ("bookings", bookings),
+            ("payments", payments),
+            ("lines", lines),
+            ("occupancy", occupancy),
+        ):
+            counts[name] += len(rows)
+            rows.clear()
+
+    @staticmethod
+    def reset_sequences():
+        models = [
+            get_user_model(),
+            SportsComplex,
+            SportsField,
+            Booking,
+            FieldOccupancy,
+            Payment,
+            PaymentLine,
+        ]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
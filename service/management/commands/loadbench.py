@@ -0,0 +1,372 @@
+import json
+import math
+import random
+import re
+import secrets
+import subprocess
+import threading
+import time as timer
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from service.bookings import book_slots
+from service.models import (
+    Booking,
+    Payment,
+    SportsComplex,
+    SportsField,
+)
+from service.occupancy import field_schedule
+
+BENCH_EMAIL = "loadbench@example.com"
+DEFAULT_MIX = "search=50,retrieve=20,booking=10,schedule=15,payment=5"
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class InProcessTransport:
+    """Requests through the Django test client, queries counted directly."""
+
+    def __init__(self, user):
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def request(self, method, path, data):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, data, format="json")
+        return response.status_code, len(context.captured_queries)
+
+    def close(self):
+        connection.close()
+
+
+class HttpTransport:
+    """Requests to a running server, queries read from Server-Timing."""
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def request(self, method, path, data):
+        response = self.session.request(
+            method, self.base_url + path, json=data, timeout=60
+        )
+        match = SERVER_TIMING_QUERIES.search(
+            response.headers.get("Server-Timing", "")
+        )
+        return response.status_code, int(match[1]) if match else None
+
+    def close(self):
+        self.session.close()
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted ``values``."""
+    if not values:
+        return None
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a mixed workload of the booking API hot paths in-process "
+        "or against a running server and report latency percentiles, "
+        "throughput and query counts per scenario"
+    )
+
+    scenarios = ("search", "retrieve", "booking", "schedule", "payment")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server, e.g. http://localhost:8000. "
+                 "Requests run in-process when omitted",
+        )
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--warmup", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--mix",
+            type=parse_mix,
+            default=parse_mix(DEFAULT_MIX),
+            help=f"Scenario weights, default {DEFAULT_MIX}",
+        )
+        parser.add_argument(
+            "--burst",
+            type=int,
+            default=3,
+            help="Slots per booking request",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Write the results as JSON to this file",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the bookings and payments made by the benchmark "
+                 "and the user that made them",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["mix"]) - set(self.scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(unknown)}")
+        if options["mix"].get("payment") and not settings.STRIPE_STUB:
+            raise CommandError(
+                "The payment scenario queues checkout sessions, "
+                "run it with STRIPE_STUB=True"
+            )
+        self.rng = random.Random(options["seed"])
+        self.complex_ids = list(
+            SportsComplex.objects.values_list("id", flat=True)[:1000]
+        )
+        self.fields = list(
+            SportsField.objects.select_related("complex")[:1000]
+        )
+        if not self.complex_ids or not self.fields:
+            raise CommandError(
+                "No complexes or fields, create some with generate_data"
+            )
+
+        self.user = self.bench_user()
+        self.next_day = max(
+            Booking.objects.filter(personal_data=self.user).aggregate(
+                last=Max("day")
+            )["last"] or date.min,
+            date.today() + timedelta(days=365),
+        ) + timedelta(days=1)
+
+        warmup = self.plan(options["warmup"], options)
+        plan = self.plan(options["requests"], options)
+        started_at = timezone.now()
+        try:
+            # In-process requests skip throttling, which the views read
+            # from APIView at import time. A server applies THROTTLE_RATE_*.
+            with patch.object(APIView, "throttle_classes", ()), \
+                    override_settings(
+                        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+                    ):
+                self.run_plan(warmup, options)
+                results, elapsed = self.run_plan(plan, options)
+        finally:
+            if options["keep"]:
+                # The bookings stay with the user, the password of this
+                # run does not.
+                self.user.set_unusable_password()
+                self.user.save(update_fields=["password"])
+            else:
+                self.cleanup()
+
+        report = self.report(results, elapsed, options)
+        report["started_at"] = started_at.isoformat()
+        if options["output"]:
+            options["output"].write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"results written to {options['output']}")
+
+    def bench_user(self):
+        """The user making the requests, with a password for this run."""
+        user, _ = get_user_model().objects.get_or_create(email=BENCH_EMAIL)
+        self.password = secrets.token_urlsafe(32)
+        user.set_password(self.password)
+        user.save(update_fields=["password"])
+        return user
+
+    def plan(self, count, options):
+        """Build the request list up front so a seed replays the same run."""
+        names = list(options["mix"])
+        weights = [options["mix"][name] for name in names]
+        return [
+            (name, *getattr(self, f"build_{name}")(options))
+            for name in self.rng.choices(names, weights, k=count)
+        ]
+
+    def build_search(self, options):
+        day = date.today() + timedelta(days=self.rng.randrange(7))
+        start = self.rng.choice(
+            field_schedule(self.rng.choice(self.fields)).times()
+        )
+        query = "&".join([
+            f"activity={self.rng.choice(SportsField.SportsActivity.values)}",
+            f"location={self.rng.choice(SportsComplex.SportsLocation.values)}",
+            f"date={day}",
+            f"time={start:%H:%M}",
+        ])
+        return "get", f"{reverse('service:sportscomplex-list')}?{query}", None
+
+    def build_retrieve(self, options):
+        pk = self.rng.choice(self.complex_ids)
+        return "get", reverse("service:sportscomplex-detail", args=[pk]), None
+
+    def build_booking(self, options):
+        field = self.rng.choice(self.fields)
+        times = field_schedule(field).times()
+        day = self.next_day
+        self.next_day += timedelta(days=1)
+        slots = sorted(
+            self.rng.sample(times, min(options["burst"], len(times)))
+        )
+        url = reverse("service:sportsfield-booking", args=[field.id])
+        return "post", url, {
+            "day_time_slots": [
+                {
+                    "day": day.isoformat(),
+                    "time": [f"{value:%H:%M}" for value in slots],
+                }
+            ]
+        }
+
+    def build_schedule(self, options):
+        return "get", reverse("client:schedule"), None
+
+    def build_payment(self, options):
+        day = self.next_day
+        self.next_day += timedelta(days=1)
+        field = self.rng.choice(self.fields)
+        [booking] = book_slots(
+            field, self.user, [(day, field_schedule(field).opens_at)]
+        )
+        return "post", reverse("service:payment-list"), {
+            "bookings": [booking.id]
+        }
+
+    def transport(self, options):
+        if not options["url"]:
+            return InProcessTransport(self.user)
+        response = requests.post(
+            options["url"].rstrip("/") + reverse("client:token_obtain_pair"),
+            json={"email": BENCH_EMAIL, "password": self.password},
+            timeout=60,
+        )
+        if response.status_code != 200:
+            raise CommandError(
+                f"Could not get a token: {response.status_code} "
+                f"{response.text[:200]}"
+            )
+        return HttpTransport(options["url"], response.json()["access"])
+
+    def run_plan(self, plan, options):
+        local = threading.local()
+        transports = []
+        lock = threading.Lock()
+
+        def run(item):
+            name, method, path, data = item
+            if not hasattr(local, "transport"):
+                local.transport = self.transport(options)
+                with lock:
+                    transports.append(local.transport)
+            start = timer.perf_counter()
+            status_code, queries = local.transport.request(method, path, data)
+            return name, timer.perf_counter() - start, status_code, queries
+
+        def close(_):
+            if hasattr(local, "transport"):
+                local.transport.close()
+
+        start = timer.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            results = list(executor.map(run, plan))
+            elapsed = timer.perf_counter() - start
+            list(executor.map(close, range(options["concurrency"])))
+        return results, elapsed
+
+    def report(self, results, elapsed, options):
+        by_scenario = defaultdict(list)
+        for result in results:
+            by_scenario[result[0]].append(result)
+
+        scenarios = {}
+        for name, rows in sorted(by_scenario.items()):
+            latencies = sorted(row[1] * 1000 for row in rows)
+            queries = [row[3] for row in rows if row[3] is not None]
+            scenarios[name] = {
+                "requests": len(rows),
+                "errors": sum(1 for row in rows if row[2] >= 400),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "mean_ms": sum(latencies) / len(latencies),
+                "throughput_rps": len(rows) / elapsed,
+                "queries_mean": (
+                    sum(queries) / len(queries) if queries else None
+                ),
+                "queries_max": max(queries) if queries else None,
+            }
+
+        self.stdout.write(
+            f"{'scenario':<10} {'reqs':>6} {'errors':>6} {'p50 ms':>8} "
+            f"{'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8}"
+        )
+        for name, stats in scenarios.items():
+            queries = stats["queries_mean"]
+            self.stdout.write(
+                f"{name:<10} {stats['requests']:>6} {stats['errors']:>6} "
+                f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                f"{stats['p99_ms']:>8.1f} {stats['throughput_rps']:>8.1f} "
+                f"{'-' if queries is None else f'{queries:.1f}':>8}"
+            )
+        self.stdout.write(
+            f"total {len(results)} requests in {elapsed:.2f}s, "
+            f"{len(results) / elapsed:.1f} req/s"
+        )
+
+        return {
+            "commit": self.commit(),
+            "target": options["url"] or "in-process",
+            "database": connection.vendor,
+            "options": {
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "mix": options["mix"],
+                "burst": options["burst"],
+                "seed": options["seed"],
+            },
+            "elapsed_s": elapsed,
+            "throughput_rps": len(results) / elapsed,
+            "scenarios": scenarios,
+        }
+
+    @staticmethod
+    def commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                capture_output=True,
+                text=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            return None
+
+    def cleanup(self):
+        Payment.objects.filter(
+            lines__booking__personal_data=self.user
+        ).delete()
+        Booking.objects.filter(personal_data=self.user).delete()
+        self.user.delete()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from service.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(
+                    expires_at__lte=now
+                ).values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            # A request may have taken a key over since it was read.
+            deleted += IdempotencyKey.objects.filter(
+                id__in=ids, expires_at__lte=now
+            ).delete()[0]
+        self.stdout.write(f"Deleted {deleted} expired idempotency keys.")
@@ -0,0 +1,100 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from service.models import (
+    ArchivedBooking,
+    Booking,
+    FieldOccupancy,
+    SportsField,
+)
+from service.occupancy import booking_masks
+
+
+class Command(BaseCommand):
+    help = "Rebuild field occupancy bitmaps from bookings and verify them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatches, exit with an error if any",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--fields-per-batch",
+            type=int,
+            default=100,
+            help="Fields rebuilt in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        field_ids = list(
+            SportsField.objects.order_by("id").values_list("id", flat=True)
+        )
+        step = options["fields_per_batch"]
+        booked = missing = changed = 0
+        # Every batch locks only the occupancy rows of its own fields, so
+        # bookings of other fields go on during a rebuild.
+        for start in range(0, len(field_ids), step):
+            counts = self.rebuild(field_ids[start:start + step], options)
+            booked += counts[0]
+            missing += counts[1]
+            changed += counts[2]
+
+        self.stdout.write(
+            f"{booked} booked field days, "
+            f"{missing} missing, {changed} mismatched"
+        )
+        if options["check"]:
+            if missing or changed:
+                raise CommandError("Occupancy bitmaps are out of date.")
+            return
+        self.stdout.write(self.style.SUCCESS("Occupancy bitmaps rebuilt."))
+
+    def rebuild(self, field_ids, options):
+        """Compare and fix the bitmaps of ``field_ids`` in a transaction.
+
+        Returns the numbers of booked, missing and mismatched field days.
+        """
+        batch_size = options["batch_size"]
+        with transaction.atomic():
+            rows = FieldOccupancy.objects.filter(field_id__in=field_ids)
+            if not options["check"]:
+                rows = rows.select_for_update()
+            stored = {(row.field_id, row.day): row for row in rows}
+            # Archived days stay occupied, see service.archive.
+            expected = {}
+            for model in (Booking, ArchivedBooking):
+                for field_id, day, mask in booking_masks(
+                    model.objects.filter(field_id__in=field_ids)
+                ):
+                    key = field_id, day
+                    expected[key] = expected.get(key, 0) | mask
+
+            # Changed rows count the change like a booking write, so cached
+            # searches and rollups of them are invalid. Rows are kept at
+            # zero, deleting them could take a version sum back.
+            missing = [
+                FieldOccupancy(
+                    field_id=field_id, day=day, slots=mask, version=1
+                )
+                for (field_id, day), mask in expected.items()
+                if (field_id, day) not in stored
+            ]
+            changed = []
+            for key, row in stored.items():
+                mask = expected.get(key, 0)
+                if row.slots != mask:
+                    row.slots = mask
+                    row.version = F("version") + 1
+                    changed.append(row)
+
+            if not options["check"]:
+                FieldOccupancy.objects.bulk_create(
+                    missing, batch_size=batch_size
+                )
+                FieldOccupancy.objects.bulk_update(
+                    changed, ["slots", "version"], batch_size=batch_size
+                )
+        return len(expected), len(missing), len(changed)
@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from service import counters
+from service.models import Payment
+from utilities.stripe import retrieve_session
+
+
+class RateLimiter:
+    """Spread calls evenly so that at most ``rate`` start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.next_call = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Command(BaseCommand):
+    help = (
+        "Check pending payments against their Stripe checkout sessions "
+        "and mark the paid ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Concurrent Stripe requests",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=20,
+            help="Maximum Stripe requests per second, 0 for no limit",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            help="File storing the last checked payment id, so an "
+                 "interrupted pass resumes where it stopped",
+        )
+        parser.add_argument(
+            "--loop",
+            type=float,
+            metavar="SECONDS",
+            help="Keep running, starting a new pass every SECONDS",
+        )
+
+    def handle(self, *args, **options):
+        self.limiter = RateLimiter(options["rate"])
+        while True:
+            self.reconcile(options)
+            if options["loop"] is None:
+                return
+            time.sleep(options["loop"])
+
+    def reconcile(self, options):
+        checkpoint = options["checkpoint"]
+        last_id = self.read_checkpoint(checkpoint)
+        checked = updated = errors = 0
+        start = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                payments = list(
+                    Payment.objects.filter(
+                        status=Payment.PaymentStatus.PENDING,
+                        session_id__isnull=False,
+                        id__gt=last_id
+                    ).order_by("id").only("id", "session_id", "status")[
+                        :options["batch_size"]
+                    ]
+                )
+                if not payments:
+                    break
+
+                paid = []
+                for payment, payment_status in zip(
+                    payments,
+                    executor.map(self.fetch_status, payments)
+                ):
+                    checked += 1
+                    if payment_status is None:
+                        errors += 1
+                    elif payment_status == "paid":
+                        payment.status = Payment.PaymentStatus.PAID
+                        paid.append(payment)
+
+                with transaction.atomic():
+                    Payment.objects.bulk_update(paid, ["status"])
+                    counters.bump_paid(paid)
+                updated += len(paid)
+                last_id = payments[-1].id
+                self.write_checkpoint(checkpoint, last_id)
+
+        self.write_checkpoint(checkpoint, None)
+        self.stdout.write(
+            f"checked {checked}, updated {updated}, errors {errors}, "
+            f"elapsed {time.monotonic() - start:.2f}s"
+        )
+
+    def fetch_status(self, payment):
+        self.limiter.wait()
+        try:
+            return retrieve_session(payment.session_id).payment_status
+        except Exception as error:
+            self.stderr.write(f"Payment {payment.id}: {error}")
+            return None
+
+    @staticmethod
+    def read_checkpoint(path):
+        if not path or not path.exists():
+            return 0
+        return json.loads(path.read_text()).get("last_id") or 0
+
+    @staticmethod
+    def write_checkpoint(path, last_id):
+        if path:
+            path.write_text(json.dumps({"last_id": last_id}))
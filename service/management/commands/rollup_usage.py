@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from service import counters
+from service.analytics import month_start, rollup_days, rollup_month
+from service.models import (
+    FieldOccupancy,
+    SportsField,
+    UsageRollup,
+    UsageRollupDay,
+    UsageRollupMonth,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll bookings and paid payments up into daily usage per complex, "
+        "activity and hour, only for the days changed since the last run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Roll up every day with bookings or rollups again",
+        )
+        parser.add_argument(
+            "--batch-days",
+            type=int,
+            default=31,
+            help="Days rolled up and written in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        # Read the versions before the data, a change committed meanwhile
+        # leaves its day with a newer version for the next run.
+        versions = dict(
+            FieldOccupancy.objects.values("day").annotate(
+                total=Sum("version")
+            ).values_list("day", "total").order_by()
+        )
+        done = dict(UsageRollupDay.objects.values_list("day", "version"))
+        if options["full"]:
+            days = set(versions) | set(done)
+        else:
+            days = {
+                day for day, version in versions.items()
+                if done.get(day) != version
+            }
+        days = sorted(days)
+
+        fields = list(
+            SportsField.objects.order_by("id").values_list(
+                "id", "complex_id", "activity"
+            )
+        )
+        rows = 0
+        for n in range(0, len(days), options["batch_days"]):
+            batch = days[n:n + options["batch_days"]]
+            rollups = rollup_days(batch, fields)
+            with transaction.atomic():
+                UsageRollup.objects.filter(day__in=batch).delete()
+                UsageRollup.objects.bulk_create(rollups, batch_size=5000)
+                UsageRollupDay.objects.filter(day__in=batch).delete()
+                UsageRollupDay.objects.bulk_create([
+                    UsageRollupDay(day=day, version=versions.get(day, 0))
+                    for day in batch
+                ])
+            rows += len(rollups)
+
+        months = sorted({month_start(day) for day in days})
+        for month in months:
+            rollups = rollup_month(month)
+            with transaction.atomic():
+                UsageRollupMonth.objects.filter(month=month).delete()
+                UsageRollupMonth.objects.bulk_create(rollups, batch_size=5000)
+
+        if days:
+            counters.bump([counters.ROLLUP_KEY])
+        self.stdout.write(
+            f"rolled up {len(days)} days into {rows} rows and "
+            f"{len(months)} months, "
+            f"elapsed {time.monotonic() - start:.2f}s"
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.4 on 2026-10-18 11:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Cast, ExtractHour, Power
+
+
+def build_occupancy(apps, schema_editor):
+    Booking = apps.get_model("service", "Booking")
+    FieldOccupancy = apps.get_model("service", "FieldOccupancy")
+    rows = Booking.objects.values("field_id", "day").annotate(
+        mask=Cast(
+            models.Sum(Power(models.Value(2), ExtractHour("time") - 8)),
+            models.IntegerField()
+        )
+    ).values_list("field_id", "day", "mask").order_by()
+    FieldOccupancy.objects.bulk_create(
+        (
+            FieldOccupancy(field_id=field_id, day=day, slots=mask)
+            for field_id, day, mask in rows.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('slots', models.IntegerField(default=0)),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='service.sportsfield')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='fieldoccupancy',
+            constraint=models.UniqueConstraint(fields=('field', 'day'), name='unique_field_occupancy'),
+        ),
+        migrations.RunPython(build_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.4 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0002_fieldoccupancy'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['personal_data', 'day'], name='booking_user_day_idx'),
+        ),
+    ]
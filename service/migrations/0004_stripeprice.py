@@ -0,0 +1,28 @@
+# Generated by Django 4.0.4 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0003_booking_user_day_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product', models.CharField(max_length=255)),
+                ('unit_amount', models.PositiveIntegerField()),
+                ('currency', models.CharField(max_length=3)),
+                ('price_id', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='stripeprice',
+            constraint=models.UniqueConstraint(fields=('product', 'unit_amount', 'currency'), name='unique_stripe_price'),
+        ),
+    ]
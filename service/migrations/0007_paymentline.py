@@ -0,0 +1,65 @@
+# Generated by Django 4.0.4 on 2026-10-18 11:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_payment_bookings(apps, schema_editor):
+    Payment = apps.get_model("service", "Payment")
+    PaymentLine = apps.get_model("service", "PaymentLine")
+    PaymentLine.objects.bulk_create(
+        (
+            PaymentLine(
+                payment_id=payment_id,
+                booking_id=booking_id,
+                unit_amount=int(money_to_pay * 100)
+            )
+            for payment_id, booking_id, money_to_pay in
+            Payment.objects.values_list(
+                "id", "booking_id", "money_to_pay"
+            ).iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0006_paymentoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit_amount', models.PositiveIntegerField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_lines', to='service.booking')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='bookings',
+            field=models.ManyToManyField(related_name='payments', through='service.PaymentLine', to='service.booking'),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='money_to_pay',
+            field=models.DecimalField(decimal_places=2, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='paymentline',
+            name='payment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='service.payment'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentline',
+            constraint=models.UniqueConstraint(fields=('payment', 'booking'), name='unique_payment_line'),
+        ),
+        migrations.RunPython(copy_payment_bookings, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='payment',
+            name='booking',
+        ),
+    ]
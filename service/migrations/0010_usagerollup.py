@@ -0,0 +1,56 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0009_changecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UsageRollupMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity', models.CharField(choices=[('Football', 'Football'), ('Basketball', 'Basketball'), ('Tennis', 'Tennis'), ('Volleyball', 'Volleyball'), ('Badminton', 'Badminton')], max_length=10)),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('revenue', models.PositiveBigIntegerField(default=0)),
+                ('month', models.DateField()),
+                ('complex', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='service.sportscomplex')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('activity', models.CharField(choices=[('Football', 'Football'), ('Basketball', 'Basketball'), ('Tennis', 'Tennis'), ('Volleyball', 'Volleyball'), ('Badminton', 'Badminton')], max_length=10)),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('revenue', models.PositiveBigIntegerField(default=0)),
+                ('day', models.DateField()),
+                ('complex', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='service.sportscomplex')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usagerollupmonth',
+            constraint=models.UniqueConstraint(fields=('month', 'complex', 'activity', 'hour'), name='unique_usage_rollup_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='usagerollup',
+            constraint=models.UniqueConstraint(fields=('day', 'complex', 'activity', 'hour'), name='unique_usage_rollup'),
+        ),
+    ]
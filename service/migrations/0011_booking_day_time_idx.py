@@ -0,0 +1,17 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0010_usagerollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['day', 'time'], name='booking_day_time_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import service.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('service', '0011_booking_day_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('day', models.DateField(db_index=True)),
+                ('time', models.TimeField()),
+                ('created_at', models.DateTimeField()),
+                ('field', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='service.sportsfield')),
+                ('personal_data', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PAID', 'Paid')], max_length=10)),
+                ('session_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('money_to_pay', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='day',
+            field=models.DateField(validators=[service.models.validate_day_not_archived]),
+        ),
+        migrations.CreateModel(
+            name='ArchivedPaymentLine',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('unit_amount', models.PositiveIntegerField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_lines', to='service.archivedbooking')),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='service.archivedpayment')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['field', 'day'], name='archived_field_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['personal_data', 'day'], name='archived_user_day_idx'),
+        ),
+    ]
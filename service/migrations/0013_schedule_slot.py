@@ -0,0 +1,47 @@
+from django.db import migrations, models
+import datetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sportscomplex',
+            name='opens_at',
+            field=models.TimeField(default=datetime.time(8, 0)),
+        ),
+        migrations.AddField(
+            model_name='sportscomplex',
+            name='closes_at',
+            field=models.TimeField(default=datetime.time(22, 0)),
+        ),
+        migrations.AddField(
+            model_name='sportscomplex',
+            name='slot_minutes',
+            field=models.PositiveSmallIntegerField(choices=[(15, 15), (30, 30), (45, 45), (60, 60), (90, 90), (120, 120)], default=60),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='time',
+            field=models.TimeField(),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='slot',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='slot',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='fieldoccupancy',
+            name='slots',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import ExtractHour, ExtractMinute
+
+UNITS_PER_DAY = 96
+
+
+def fill_slots(apps, schema_editor):
+    # One UPDATE per day over the (day, time) index, the key of a booking
+    # is its day ordinal times 96 plus the quarter hour it starts in.
+    for name in ("Booking", "ArchivedBooking"):
+        model = apps.get_model("service", name)
+        days = model.objects.filter(slot__isnull=True).values_list(
+            "day", flat=True
+        ).distinct().order_by()
+        for day in list(days):
+            model.objects.filter(day=day, slot__isnull=True).update(
+                slot=Value(day.toordinal() * UNITS_PER_DAY)
+                + ExtractHour("time") * 4
+                + ExtractMinute("time") / 15
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0013_schedule_slot'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_slots, migrations.RunPython.noop),
+    ]
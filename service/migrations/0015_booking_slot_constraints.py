@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0014_fill_booking_slot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='slot',
+            field=models.IntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='archivedbooking',
+            name='slot',
+            field=models.IntegerField(),
+        ),
+        migrations.RemoveConstraint(
+            model_name='booking',
+            name='unique_booking',
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('field', 'slot'), name='unique_booking_slot'),
+        ),
+        migrations.RemoveIndex(
+            model_name='archivedbooking',
+            name='archived_field_day_idx',
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['field', 'slot'], name='archived_field_slot_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:02
+
+from django.db import migrations
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0015_booking_slot_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='booking',
+            options={'base_manager_name': 'with_field'},
+        ),
+        migrations.AlterModelManagers(
+            name='booking',
+            managers=[
+                ('objects', django.db.models.manager.Manager()),
+                ('with_field', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+def delete_booking_counters(apps, schema_editor):
+    # Bookings count their changes on their occupancy rows now.
+    ChangeCounter = apps.get_model("service", "ChangeCounter")
+    for prefix in ("search:", "bookings:", "usage:"):
+        ChangeCounter.objects.filter(key__startswith=prefix).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0016_booking_base_manager'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fieldoccupancy',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='fieldoccupancy',
+            index=models.Index(fields=['day'], name='occupancy_day_idx'),
+        ),
+        migrations.RunPython(
+            delete_booking_counters, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.0.4 on 2026-10-18 14:29
+
+from django.conf import settings
+from django.db import migrations, models
+import service.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('service', '0017_fieldoccupancy_version'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='booking',
+            options={},
+        ),
+        migrations.AlterModelManagers(
+            name='booking',
+            managers=[
+            ],
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='field',
+            field=models.ForeignKey(on_delete=service.models.cascade_with_field, related_name='bookings', to='service.sportsfield'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='personal_data',
+            field=models.ForeignKey(on_delete=service.models.cascade_with_field, related_name='users', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
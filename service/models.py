@@ -1,13 +1,25 @@
 import os
 import uuid
-from datetime import time
+from datetime import date, timedelta
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from phonenumber_field.modelfields import PhoneNumberField
 
+from service.slots import (
+    slot_key,
+    validate_schedule,
+    DEFAULT_SCHEDULE,
+    SLOT_MINUTES_CHOICES,
+    Schedule,
+)
+
 
 def sports_complex_image_file_path(
         instance: "SportsComplex",
@@ -39,10 +51,38 @@ class SportsComplex(models.Model):
     )
     address = models.CharField(max_length=100, unique=True)
     phone = PhoneNumberField()
+    opens_at = models.TimeField(default=DEFAULT_SCHEDULE.opens_at)
+    closes_at = models.TimeField(default=DEFAULT_SCHEDULE.closes_at)
+    slot_minutes = models.PositiveSmallIntegerField(
+        choices=[(minutes, minutes) for minutes in SLOT_MINUTES_CHOICES],
+        default=DEFAULT_SCHEDULE.slot_minutes
+    )
 
     def __str__(self):
         return self.name
 
+    @property
+    def schedule(self) -> Schedule:
+        return Schedule(self.opens_at, self.closes_at, self.slot_minutes)
+
+    def clean(self):
+        validate_schedule(self.schedule)
+        if self.pk is None:
+            return
+        stored = SportsComplex.objects.filter(pk=self.pk).values_list(
+            "opens_at", "closes_at", "slot_minutes"
+        ).first()
+        # Occupancy bits and slot numbers of booked days, past and archived
+        # ones included, follow the grid they were booked on.
+        if stored and Schedule(*stored) != self.schedule and any(
+            model.objects.filter(field__complex_id=self.pk).exists()
+            for model in (Booking, ArchivedBooking)
+        ):
+            raise ValidationError(
+                "Opening hours and slots can only change while the complex "
+                "has no bookings, archived ones included."
+            )
+
 
 class SportsField(models.Model):
     class SportsActivity(models.TextChoices):
@@ -69,38 +109,120 @@ class SportsField(models.Model):
 
 
 def validate_time_in_hours(value):
-    if not (time(8, 0) <= value <= time(21, 0)):
-        raise ValidationError("Time must be between 8:00 and 21:00.")
-    if value.minute != 0 or value.second != 0:
-        raise ValidationError("Time must be in whole hours.")
+    """Deprecated, referenced by the first migration only. Booking times
+    follow the schedule of their complex, see
+    ``service.bookings.check_slots``."""
+
+
+def archive_horizon() -> date:
+    """First day whose bookings are never moved to ``ArchivedBooking``."""
+    return date.today() - timedelta(days=settings.BOOKING_ARCHIVE_DAYS)
+
+
+def validate_day_not_archived(value):
+    horizon = archive_horizon()
+    if value < horizon:
+        raise ValidationError(f"Days before {horizon} are archived.")
+
+
+def cascade_with_field(collector, field, sub_objs, using):
+    """CASCADE that loads the field and complex of the deleted bookings.
+
+    Their delete signal reads the schedule of each booking's complex, the
+    collector would otherwise look it up once per row.
+    """
+    prefetch_related_objects(list(sub_objs), "field__complex")
+    models.CASCADE(collector, field, sub_objs, using)
 
 
 class Booking(models.Model):
     field = models.ForeignKey(
         SportsField,
-        on_delete=models.CASCADE,
+        on_delete=cascade_with_field,
         related_name="bookings"
     )
-    day = models.DateField()
-    time = models.TimeField(validators=[validate_time_in_hours])
+    day = models.DateField(validators=[validate_day_not_archived])
+    time = models.TimeField()
+    # See service.slots, kept in step with day and time by save().
+    slot = models.IntegerField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     personal_data = models.ForeignKey(
         get_user_model(),
-        on_delete=models.CASCADE,
+        on_delete=cascade_with_field,
         related_name="users"
     )
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=["field", "day", "time"],
-                name="unique_booking"
+                fields=["field", "slot"],
+                name="unique_booking_slot"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["personal_data", "day"],
+                name="booking_user_day_idx"
+            ),
+            models.Index(
+                fields=["day", "time"],
+                name="booking_day_time_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.personal_data} - {self.day} - {self.time}"
 
+    def clean(self):
+        if self.field_id is None or self.time is None:
+            return
+        schedule = self.field.complex.schedule
+        if schedule.slot(self.time) is None:
+            raise ValidationError({
+                "time": f"Must be one of {', '.join(schedule.labels())}."
+            })
+
+    def save(self, *args, **kwargs):
+        self.slot = slot_key(self.day, self.time)
+        # Keep the insert and the occupancy update from service.signals
+        # in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class FieldOccupancy(models.Model):
+    """Bitmask of booked slots of a field on a day.
+
+    Bit ``n`` is set when the ``n``-th slot of the complex's schedule is
+    booked. Rows are maintained by ``service.occupancy`` on booking writes
+    and can be rebuilt with the ``rebuild_occupancy`` command. ``version``
+    counts the booking and payment changes of the field day, see
+    ``service.counters``.
+    """
+
+    field = models.ForeignKey(
+        SportsField,
+        on_delete=models.CASCADE,
+        related_name="occupancy"
+    )
+    day = models.DateField()
+    slots = models.BigIntegerField(default=0)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["field", "day"],
+                name="unique_field_occupancy"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="occupancy_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.field_id} - {self.day} - {self.slots:b}"
+
 
 class Payment(models.Model):
     class PaymentStatus(models.TextChoices):
@@ -112,17 +234,316 @@ class Payment(models.Model):
         choices=PaymentStatus.choices,
         default=PaymentStatus.PENDING,
     )
+    bookings = models.ManyToManyField(
+        Booking,
+        through="PaymentLine",
+        related_name="payments"
+    )
+    session_url = models.URLField(max_length=1000, null=True, blank=True)
+    session_id = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    money_to_pay = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.id} - {self.money_to_pay}"
+
+
+class PaymentLine(models.Model):
+    """Booking paid for by a payment, priced in cents at checkout time."""
+
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.CASCADE,
+        related_name="lines"
+    )
     booking = models.ForeignKey(
         Booking,
         on_delete=models.CASCADE,
-        related_name="booking_payments"
+        related_name="payment_lines"
+    )
+    unit_amount = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["payment", "booking"],
+                name="unique_payment_line"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.payment_id} - {self.booking_id} - {self.unit_amount}"
+
+
+class PaymentOutbox(models.Model):
+    """Checkout session still to be created for a payment.
+
+    Written in the transaction that creates the payment and processed by
+    the ``dispatch_payments`` command, so requests never wait for Stripe.
+    """
+
+    class OutboxStatus(models.TextChoices):
+        PENDING = "PENDING"
+        PROCESSING = "PROCESSING"
+        DONE = "DONE"
+        FAILED = "FAILED"
+
+    payment = models.OneToOneField(
+        Payment,
+        on_delete=models.CASCADE,
+        related_name="outbox"
     )
-    session_url = models.URLField(
-        max_length=1000,
-        default="http://127.0.0.1:8000"
+    status = models.CharField(
+        max_length=10,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING,
     )
-    session_id = models.CharField(max_length=255, default=1)
-    money_to_pay = models.DecimalField(max_digits=5, decimal_places=2)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "available_at"],
+                name="outbox_status_available_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.payment_id} - {self.status}"
+
+
+class StripePrice(models.Model):
+    """Stripe price reused by every checkout with the same amount."""
+
+    product = models.CharField(max_length=255)
+    unit_amount = models.PositiveIntegerField()
+    currency = models.CharField(max_length=3)
+    price_id = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "unit_amount", "currency"],
+                name="unique_stripe_price"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.price_id} - {self.unit_amount} {self.currency}"
+
+
+class StripeEvent(models.Model):
+    """Stripe webhook event that has already been processed."""
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=255)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event_id} - {self.type}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a POST made with an ``Idempotency-Key`` header.
+
+    ``status_code`` stays empty while the first request is running, which
+    holds the key until ``expires_at`` at most.
+    """
+
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"],
+                name="unique_idempotency_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
+
+
+class ChangeCounter(models.Model):
+    """Counter bumped in the transaction of every change it covers.
+
+    Cached results remember the counters they were computed at and are
+    only reused while those are unchanged, see ``service.counters``.
+    """
+
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} - {self.value}"
+
+
+class UsageCounts(models.Model):
+    """Booked slots and paid revenue of an activity of a complex in one
+    hour of the day. Revenue is in cents."""
+
+    complex = models.ForeignKey(
+        SportsComplex,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    activity = models.CharField(
+        max_length=10,
+        choices=SportsField.SportsActivity.choices
+    )
+    hour = models.PositiveSmallIntegerField()
+    booked = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+    revenue = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class UsageRollup(UsageCounts):
+    """Usage of one day, filled by the ``rollup_usage`` command.
+
+    Only hours with a booking or a payment are stored.
+    """
+
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "complex", "activity", "hour"],
+                name="unique_usage_rollup"
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.day} - {self.complex_id} - {self.activity} - {self.hour}"
+        )
+
+
+class UsageRollupMonth(UsageCounts):
+    """Sum of the daily rollups of a month, starting on ``month``."""
+
+    month = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "complex", "activity", "hour"],
+                name="unique_usage_rollup_month"
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.month:%Y-%m} - {self.complex_id} - {self.activity} - "
+            f"{self.hour}"
+        )
+
+
+class UsageRollupDay(models.Model):
+    """Sum of the occupancy versions of a day when it was rolled up."""
+
+    day = models.DateField(unique=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.day} - {self.version}"
+
+
+class ArchivedBooking(models.Model):
+    """Booking moved out of ``Booking`` by the ``archive_bookings`` command.
+
+    The columns are those of ``Booking`` in the same order, so both tables
+    can be read in one union, see ``service.archive``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    field = models.ForeignKey(
+        SportsField,
+        on_delete=models.CASCADE,
+        related_name="archived_bookings",
+        db_index=False
+    )
+    day = models.DateField(db_index=True)
+    time = models.TimeField()
+    slot = models.IntegerField()
+    created_at = models.DateTimeField()
+    personal_data = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="archived_bookings",
+        db_index=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["field", "slot"],
+                name="archived_field_slot_idx"
+            ),
+            models.Index(
+                fields=["personal_data", "day"],
+                name="archived_user_day_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.personal_data_id} - {self.day} - {self.time}"
+
+
+class ArchivedPayment(models.Model):
+    """Payment whose bookings were all archived."""
+
+    id = models.BigIntegerField(primary_key=True)
+    status = models.CharField(
+        max_length=10,
+        choices=Payment.PaymentStatus.choices
+    )
+    session_id = models.CharField(max_length=255, null=True, blank=True)
+    money_to_pay = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self):
         return f"{self.id} - {self.money_to_pay}"
+
+
+class ArchivedPaymentLine(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    payment = models.ForeignKey(
+        ArchivedPayment,
+        on_delete=models.CASCADE,
+        related_name="lines"
+    )
+    booking = models.ForeignKey(
+        ArchivedBooking,
+        on_delete=models.CASCADE,
+        related_name="payment_lines"
+    )
+    unit_amount = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.payment_id} - {self.booking_id} - {self.unit_amount}"
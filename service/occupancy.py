@@ -0,0 +1,143 @@
+from collections import defaultdict
+from datetime import date, time
+from typing import Iterable
+
+from django.db.models import BigIntegerField, F, Sum, Value
+from django.db.models.functions import Cast, Mod
+
+from service.models import (
+    Booking,
+    FieldOccupancy,
+    SportsComplex,
+    SportsField,
+)
+from service.slots import (
+    time_unit,
+    Schedule,
+    UNITS_PER_DAY,
+    UNIT_MINUTES,
+)
+
+
+def field_schedule(field) -> Schedule:
+    """Schedule of the complex of ``field``, a field or a field id."""
+    if isinstance(field, SportsField) and SportsField.complex.is_cached(
+        field
+    ):
+        return field.complex.schedule
+    return Schedule(*SportsComplex.objects.filter(
+        fields__pk=getattr(field, "pk", field)
+    ).values_list("opens_at", "closes_at", "slot_minutes").get())
+
+
+def day_masks(
+        schedule: Schedule,
+        slots: Iterable[tuple[date, time]]
+) -> dict[date, int]:
+    """Slot bits booked per day, times off the grid are left out."""
+    masks = defaultdict(int)
+    for day, value in slots:
+        n = schedule.slot(value)
+        if n is not None:
+            masks[day] |= 1 << n
+    return dict(masks)
+
+
+def _days_by_mask(masks: dict[date, int]) -> dict[int, list[date]]:
+    # Recurring bookings repeat the same hours, so this usually collapses
+    # a multi-day request into a single UPDATE.
+    days = defaultdict(list)
+    for day, mask in masks.items():
+        days[mask].append(day)
+    return days
+
+
+def occupy(field_id: int, masks: dict[date, int]) -> None:
+    """Mark slots as booked. Must run in the transaction of the insert."""
+    if not masks:
+        return
+    FieldOccupancy.objects.bulk_create(
+        [FieldOccupancy(field_id=field_id, day=day) for day in sorted(masks)],
+        ignore_conflicts=True
+    )
+    for mask, days in _days_by_mask(masks).items():
+        FieldOccupancy.objects.filter(field_id=field_id, day__in=days).update(
+            slots=F("slots").bitor(mask), version=F("version") + 1
+        )
+
+
+def change(changes: dict[tuple[int, date], tuple[int, int]]) -> None:
+    """Set and clear slots of field days and count the change.
+
+    ``changes`` maps ``(field_id, day)`` to the booked and the released
+    slot bits. Must run in the transaction of the booking write. Rows are
+    written in sorted order, so writers of the same field days never wait
+    on each other in a cycle.
+    """
+    keys = sorted(changes)
+    FieldOccupancy.objects.bulk_create(
+        [FieldOccupancy(field_id=field_id, day=day) for field_id, day in keys],
+        ignore_conflicts=True
+    )
+    for field_id, day in keys:
+        booked, released = changes[field_id, day]
+        FieldOccupancy.objects.filter(field_id=field_id, day=day).update(
+            slots=F("slots").bitand(~released).bitor(booked),
+            version=F("version") + 1
+        )
+
+
+def touch(field_days: Iterable[tuple[int, date]]) -> None:
+    """Count a change of the field days without changing their slots."""
+    change({field_day: (0, 0) for field_day in field_days})
+
+
+def booking_masks(queryset=None):
+    """Aggregate bookings into ``(field_id, day, mask)`` rows in SQL.
+
+    Runs one query per distinct schedule of the complexes. ``(field,
+    slot)`` is unique, so the sum of the slot bits of a field day is the
+    same as their bitwise OR. Bookings off their complex's grid are left
+    out.
+    """
+    if queryset is None:
+        queryset = Booking.objects.all()
+    schedules = SportsComplex.objects.values_list(
+        "opens_at", "closes_at", "slot_minutes"
+    ).distinct().order_by()
+    for schedule in map(Schedule._make, schedules):
+        first = time_unit(schedule.opens_at)
+        units = schedule.slot_minutes // UNIT_MINUTES
+        yield from queryset.filter(
+            field__complex__opens_at=schedule.opens_at,
+            field__complex__closes_at=schedule.closes_at,
+            field__complex__slot_minutes=schedule.slot_minutes,
+        ).alias(unit=Mod(F("slot"), UNITS_PER_DAY)).filter(
+            unit__in=[
+                first + n * units for n in range(schedule.slots_per_day)
+            ]
+        ).values("field_id", "day").annotate(
+            mask=Cast(
+                Sum(
+                    Cast(Value(1), BigIntegerField()).bitleftshift(
+                        (F("unit") - first) / units
+                    )
+                ),
+                BigIntegerField()
+            )
+        ).values_list("field_id", "day", "mask").order_by().iterator()
+
+
+def free_slots(
+        schedule: Schedule,
+        masks: dict[date, int],
+        days: list[date]
+) -> list[str]:
+    """Render a days x slots grid, one string per day, ``1`` for free."""
+    return [
+        format(
+            schedule.full_mask & ~masks.get(day, 0),
+            f"0{schedule.slots_per_day}b"
+        )[::-1]
+        for day in days
+    ]
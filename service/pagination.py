@@ -0,0 +1,242 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import or_
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (
+    BasePagination,
+    LimitOffsetPagination,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique, stable ordering.
+
+    Pages are fetched with a ``WHERE (a, b, id) > (...)`` style filter, so
+    every page costs the same regardless of its depth. Clients opt in with
+    ``?pagination=cursor`` and follow the ``next``/``previous`` links; the
+    total count is only computed on ``?count=true``. Requests without it
+    keep the limit/offset behaviour of ``offset_pagination_class``.
+    """
+
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    count_query_param = "count"
+    offset_pagination_class = LimitOffsetPagination
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.offset_pagination = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        params = request.query_params
+        if (
+            self.cursor_query_param not in params
+            and params.get(self.mode_query_param) != "cursor"
+        ):
+            self.offset_pagination = self.offset_pagination_class()
+            return self.offset_pagination.paginate_queryset(
+                queryset, request, view
+            )
+
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        if params.get(self.count_query_param) == "true":
+            self.count = queryset.count()
+
+        self.fields = [
+            queryset.model._meta.get_field(name) for name in self.ordering
+        ]
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by(
+                *(f"-{name}" for name in self.ordering)
+            )
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if self.offset_pagination:
+            return self.offset_pagination.get_paginated_response(data)
+
+        response = {}
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def after(self, position, reverse):
+        lookup = "lt" if reverse else "gt"
+        names = [field.name for field in self.fields]
+        after = reduce(or_, (
+            Q(**dict(zip(names[:n], position[:n])),
+              **{f"{names[n]}__{lookup}": position[n]})
+            for n in range(len(names))
+        ))
+        if len(names) == 1:
+            return after
+        # The OR alone is no range of the leading column to the planner,
+        # the redundant bound lets an index on it start at the cursor.
+        return Q(**{f"{names[0]}__{lookup}e": position[0]}) & after
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if len(cursor["p"]) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, cursor["p"])
+            ]
+            return position, bool(cursor.get("r"))
+        except Exception:
+            raise ValidationError(
+                {self.cursor_query_param: [self.invalid_cursor_message]}
+            )
+
+    def encode_cursor(self, item, reverse):
+        position = [
+            field.value_to_string(item) for field in self.fields
+        ]
+        cursor = {"p": position, "r": 1} if reverse else {"p": position}
+        encoded = urlsafe_b64encode(json.dumps(cursor).encode("ascii"))
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, "cursor")
+        return replace_query_param(
+            url, self.cursor_query_param, encoded.decode("ascii")
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_schema_operation_parameters(self, view):
+        return self.offset_pagination_class().get_schema_operation_parameters(
+            view
+        ) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor from a next/previous link",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'true' to include the total count "
+                               "in cursor mode",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+    def get_paginated_response_schema(self, schema):
+        return self.offset_pagination_class().get_paginated_response_schema(
+            schema
+        )
+
+
+class BookingPagination(KeysetPagination):
+    ordering = ("day", "time", "id")
+
+
+class PaymentPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class UserPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+def planner_estimate(queryset):
+    """Row count of ``queryset`` estimated by the PostgreSQL planner.
+
+    Returns None on other databases.
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator of admin changelists over large tables.
+
+    Counts estimated at ``exact_below`` rows or more are not computed,
+    ``COUNT(*)`` of millions of rows scans them all. The last pages of an
+    overestimated count are empty.
+    """
+
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        estimate = planner_estimate(self.object_list)
+        if estimate is None or estimate < self.exact_below:
+            return super().count
+        return estimate
@@ -0,0 +1,61 @@
+"""In-process cache of complex search results for a given date.
+
+Entries hold the matching complex ids and are keyed by the normalized
+filters together with the catalogue digest and the bookings version of
+the searched city and day (see ``service.counters``). A booking counts
+its change on its own field day in its transaction, so it only
+invalidates the searches it can affect and no entry computed before it
+commits is used after.
+Pagination is applied to the cached ids, one entry serves every page.
+"""
+from datetime import date, time
+from threading import Lock
+from typing import Callable, Optional
+
+from cachetools import LRUCache
+from django.conf import settings
+
+from service import counters
+from utilities.metrics import registry
+
+_results = LRUCache(maxsize=settings.SEARCH_CACHE_SIZE)
+_lock = Lock()
+
+
+def cached_search(
+        activity: str,
+        location: str,
+        day: date,
+        at: Optional[time],
+        digest: str,
+        search: Callable[[], list[int]]
+) -> list[int]:
+    """Return the ids found by ``search``, reusing an unchanged result."""
+    activity = (activity or "").lower()
+    location = (location or "").lower()
+    # Read the version before searching, a result is then never older
+    # than the version it is stored under.
+    key = (
+        activity,
+        location,
+        day,
+        at,
+        digest,
+        counters.search_version(location, day),
+    )
+    with _lock:
+        ids = _results.get(key)
+    if ids is not None:
+        registry.increment("search_cache_requests_total", 'result="hit"')
+        return ids
+
+    registry.increment("search_cache_requests_total", 'result="miss"')
+    ids = search()
+    with _lock:
+        _results[key] = ids
+    return ids
+
+
+def clear() -> None:
+    with _lock:
+        _results.clear()
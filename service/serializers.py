@@ -1,14 +1,23 @@
+from copy import copy
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
-from django.db import transaction
 
 from service.models import (
     SportsComplex,
     SportsField,
     Booking,
     Payment,
-    validate_time_in_hours
+    PaymentLine,
+    validate_day_not_archived,
 )
+from service.archive import ARCHIVED_ATTR
+from service.bookings import book_slots, check_slots
+from service.exceptions import BookingConflict
+from service.occupancy import field_schedule
 
 
 class SportsFieldComplexSerializer(serializers.ModelSerializer):
@@ -37,9 +46,23 @@ class SportsComplexSerializer(serializers.ModelSerializer):
             "location",
             "address",
             "phone",
+            "opens_at",
+            "closes_at",
+            "slot_minutes",
             "fields"
         ]
 
+    def validate(self, attrs):
+        sports_complex = copy(self.instance) or SportsComplex()
+        for name in ("opens_at", "closes_at", "slot_minutes"):
+            if name in attrs:
+                setattr(sports_complex, name, attrs[name])
+        try:
+            sports_complex.clean()
+        except DjangoValidationError as error:
+            raise serializers.ValidationError(error.messages)
+        return attrs
+
     def create(self, validated_data):
         fields_data = validated_data.pop("fields", None)
         complex = SportsComplex.objects.create(**validated_data)
@@ -70,6 +93,11 @@ class SportsFieldSerializer(serializers.ModelSerializer):
 
 
 class BookingSerializer(serializers.ModelSerializer):
+    # The complex carries the schedule the time is checked against.
+    field = serializers.PrimaryKeyRelatedField(
+        queryset=SportsField.objects.select_related("complex")
+    )
+
     class Meta:
         model = Booking
         fields = [
@@ -80,19 +108,35 @@ class BookingSerializer(serializers.ModelSerializer):
             "created_at",
             "personal_data"
         ]
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Booking.objects.all(),
-                fields=["field", "day", "time"]
-            )
-        ]
+        # unique_booking_slot is enforced by the insert itself, see book_slots.
+        validators = []
+
+    def create(self, validated_data):
+        [booking] = book_slots(
+            validated_data["field"],
+            validated_data["personal_data"],
+            [(validated_data["day"], validated_data["time"])]
+        )
+        return booking
+
+    def update(self, instance, validated_data):
+        check_slots(
+            field_schedule(validated_data.get("field", instance.field)),
+            [(
+                validated_data.get("day", instance.day),
+                validated_data.get("time", instance.time)
+            )]
+        )
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise BookingConflict([(instance.day, instance.time)])
 
 
 class DayTimeSerializer(serializers.Serializer):
-    day = serializers.DateField()
-    time = serializers.ListField(
-        child=serializers.TimeField(validators=[validate_time_in_hours])
-    )
+    day = serializers.DateField(validators=[validate_day_not_archived])
+    time = serializers.ListField(child=serializers.TimeField())
 
 
 class SportsFieldBookingSerializer(serializers.ModelSerializer):
@@ -114,18 +158,17 @@ class SportsFieldBookingSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         day_time_slots_data = validated_data.pop("day_time_slots", [])
-        bookings = []
-
-        with transaction.atomic():
-            for day_time_slot in day_time_slots_data:
-                day = day_time_slot["day"]
-                for time in day_time_slot["time"]:
-                    booking = Booking.objects.create(
-                        day=day,
-                        time=time,
-                        **validated_data
-                    )
-                    bookings.append(booking)
+        slots = [
+            (day_time_slot["day"], time)
+            for day_time_slot in day_time_slots_data
+            for time in day_time_slot["time"]
+        ]
+
+        bookings = book_slots(
+            validated_data["field"],
+            validated_data["personal_data"],
+            slots
+        )
 
         self.created_bookings = bookings
         return bookings
@@ -152,7 +195,7 @@ class BookingCustomSerializer(serializers.ModelSerializer):
 
 
 class SportsFieldWithBookingsSerializer(serializers.ModelSerializer):
-    bookings = BookingCustomSerializer(many=True, read_only=True)
+    bookings = serializers.SerializerMethodField()
 
     class Meta:
         model = SportsField
@@ -163,6 +206,17 @@ class SportsFieldWithBookingsSerializer(serializers.ModelSerializer):
             "bookings"
         ]
 
+    @extend_schema_field(BookingCustomSerializer(many=True))
+    def get_bookings(self, field):
+        """Prefetched bookings, with the archived ones of the range."""
+        bookings = list(field.bookings.all())
+        archived = getattr(field, ARCHIVED_ATTR, None)
+        if archived:
+            bookings = sorted(
+                archived + bookings, key=attrgetter("day", "time")
+            )
+        return BookingCustomSerializer(bookings, many=True).data
+
 
 class SportsComplexRetrieveSerializer(SportsComplexSerializer):
     fields = SportsFieldWithBookingsSerializer(many=True, read_only=True)
@@ -176,6 +230,9 @@ class SportsComplexRetrieveSerializer(SportsComplexSerializer):
             "location",
             "phone",
             "address",
+            "opens_at",
+            "closes_at",
+            "slot_minutes",
             "fields"
         ]
 
@@ -199,16 +256,39 @@ class BookingRetrieveSerializer(serializers.ModelSerializer):
         read_only_fields = ["field", "personal_data", "created_at"]
 
 
+class BookingIdsField(serializers.ListField):
+    """Booking ids, resolved together in PaymentSerializer.validate."""
+
+    child = serializers.IntegerField(min_value=1)
+
+    def to_representation(self, data):
+        return [booking.pk for booking in data.all()]
+
+
 class PaymentSerializer(serializers.ModelSerializer):
+    bookings = BookingIdsField(required=False)
+    booking = serializers.IntegerField(
+        write_only=True,
+        required=False,
+        min_value=1,
+        help_text="Single booking to pay for, kept for older clients",
+    )
+    checkout_status = serializers.CharField(
+        source="outbox.status",
+        read_only=True
+    )
+
     class Meta:
         model = Payment
         fields = [
             "id",
             "status",
+            "bookings",
             "booking",
             "session_url",
             "session_id",
             "money_to_pay",
+            "checkout_status",
         ]
         read_only_fields = [
             "status",
@@ -216,3 +296,37 @@ class PaymentSerializer(serializers.ModelSerializer):
             "session_id",
             "money_to_pay"
         ]
+
+    def validate(self, attrs):
+        ids = set(attrs.get("bookings", []))
+        if "booking" in attrs:
+            ids.add(attrs.pop("booking"))
+        if not ids:
+            raise serializers.ValidationError(
+                {"bookings": "At least one booking is required."}
+            )
+
+        bookings = list(
+            Booking.objects.select_related("field").filter(id__in=ids)
+        )
+        missing = ids - {booking.id for booking in bookings}
+        if missing:
+            raise serializers.ValidationError(
+                {"bookings": f"Unknown bookings: {sorted(missing)}."}
+            )
+        user = self.context["request"].user
+        if any(booking.personal_data_id != user.id for booking in bookings):
+            raise serializers.ValidationError(
+                {"bookings": "You can only pay for your own bookings."}
+            )
+        paid = PaymentLine.objects.filter(
+            booking__in=bookings,
+            payment__status=Payment.PaymentStatus.PAID
+        ).values_list("booking_id", flat=True)
+        if paid:
+            raise serializers.ValidationError(
+                {"bookings": f"Already paid: {sorted(set(paid))}."}
+            )
+
+        attrs["bookings"] = bookings
+        return attrs
@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from service import catalogue, occupancy
+from service.archive import moving_bookings
+from service.models import Booking, SportsComplex, SportsField
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booked_slot(sender, instance, raw=False, **kwargs):
+    instance._booked_slot = None
+    if raw or instance._state.adding:
+        return
+    instance._booked_slot = Booking.objects.filter(
+        pk=instance.pk
+    ).values_list("field_id", "day", "time").first()
+
+
+def slot_bit(field, value) -> int:
+    """Bit of the slot starting at ``value``, 0 off the complex's grid."""
+    n = occupancy.field_schedule(field).slot(value)
+    return 0 if n is None else 1 << n
+
+
+@receiver(post_save, sender=Booking)
+def occupy_booked_slot(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_booked_slot", None)
+    current = (instance.field_id, instance.day, instance.time)
+    # Both field days change in one call, which writes them in order.
+    changes = defaultdict(lambda: [0, 0])
+    if previous and previous != current:
+        field_id, day, value = previous
+        changes[field_id, day][1] = slot_bit(field_id, value)
+    # The same slot only counts the change, the booking views show it.
+    changes[instance.field_id, instance.day][0] = (
+        0 if previous == current else slot_bit(instance.field, instance.time)
+    )
+    occupancy.change(changes)
+
+
+@receiver(post_delete, sender=Booking)
+def release_booked_slot(sender, instance, **kwargs):
+    if moving_bookings():
+        return
+    # Cascades load the field and complex with the booking, see
+    # cascade_with_field.
+    occupancy.change({
+        (instance.field_id, instance.day): (
+            0, slot_bit(instance.field, instance.time)
+        )
+    })
+
+
+@receiver(post_save, sender=SportsComplex)
+@receiver(post_delete, sender=SportsComplex)
+@receiver(post_save, sender=SportsField)
+@receiver(post_delete, sender=SportsField)
+def invalidate_catalogue(sender, raw=False, **kwargs):
+    if not raw:
+        catalogue.invalidate()
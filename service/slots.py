@@ -0,0 +1,116 @@
+"""Integer slot keys of bookings and the daily slot grids of complexes.
+
+A booking is keyed by ``day.toordinal() * UNITS_PER_DAY + unit``, where
+``unit`` is the quarter hour of the day its slot starts in. Keys of one
+field order like ``(day, time)``, so day ranges and conflicts are integer
+comparisons on the ``(field, slot)`` index.
+
+Every complex opens at ``opens_at`` and closes at ``closes_at`` with slots
+of ``slot_minutes``, its ``Schedule``. Bit ``n`` of an occupancy mask is
+the ``n``-th slot of that grid.
+"""
+from datetime import date, time
+from typing import NamedTuple, Optional
+
+from django.core.exceptions import ValidationError
+
+UNIT_MINUTES = 15
+UNITS_PER_DAY = 24 * 60 // UNIT_MINUTES
+# Occupancy masks are signed 64 bit integers.
+MAX_SLOTS_PER_DAY = 63
+SLOT_MINUTES_CHOICES = [15, 30, 45, 60, 90, 120]
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def time_unit(value: time) -> int:
+    """Quarter hour of the day ``value`` falls in."""
+    return _minutes(value) // UNIT_MINUTES
+
+
+def slot_key(day: date, value: time) -> int:
+    return day.toordinal() * UNITS_PER_DAY + time_unit(value)
+
+
+def day_keys(date_from: date, date_to: date) -> tuple[int, int]:
+    """First and last possible key of the days from ``date_from`` to
+    ``date_to``, for ``slot__range``."""
+    return (
+        date_from.toordinal() * UNITS_PER_DAY,
+        (date_to.toordinal() + 1) * UNITS_PER_DAY - 1,
+    )
+
+
+class Schedule(NamedTuple):
+    opens_at: time
+    closes_at: time
+    slot_minutes: int
+
+    @property
+    def slots_per_day(self) -> int:
+        return (
+            _minutes(self.closes_at) - _minutes(self.opens_at)
+        ) // self.slot_minutes
+
+    @property
+    def full_mask(self) -> int:
+        return (1 << self.slots_per_day) - 1
+
+    def start(self, n: int) -> time:
+        minutes = _minutes(self.opens_at) + n * self.slot_minutes
+        return time(minutes // 60, minutes % 60)
+
+    def times(self) -> list[time]:
+        return [self.start(n) for n in range(self.slots_per_day)]
+
+    def labels(self) -> list[str]:
+        return [f"{value:%H:%M}" for value in self.times()]
+
+    def slot(self, value: time) -> Optional[int]:
+        """Number of the slot starting at ``value``, None if none does."""
+        offset = _minutes(value) - _minutes(self.opens_at)
+        if value.second or value.microsecond or offset < 0 \
+                or offset % self.slot_minutes:
+            return None
+        n = offset // self.slot_minutes
+        return n if n < self.slots_per_day else None
+
+    def window_mask(self, value: time, minutes: int = 60) -> int:
+        """Mask of the slots starting within ``minutes`` of ``value``."""
+        mask = 0
+        for n, start in enumerate(self.times()):
+            if abs(_minutes(start) - _minutes(value)) <= minutes:
+                mask |= 1 << n
+        return mask
+
+
+DEFAULT_SCHEDULE = Schedule(time(8), time(22), 60)
+
+
+def validate_schedule(schedule: Schedule) -> None:
+    if schedule.slot_minutes not in SLOT_MINUTES_CHOICES:
+        raise ValidationError(
+            "Slots must last one of "
+            f"{', '.join(map(str, SLOT_MINUTES_CHOICES))} minutes."
+        )
+    for value in (schedule.opens_at, schedule.closes_at):
+        if value.second or value.microsecond \
+                or value.minute % UNIT_MINUTES:
+            raise ValidationError(
+                f"Opening hours must be on whole {UNIT_MINUTES} minutes."
+            )
+    if schedule.closes_at <= schedule.opens_at:
+        raise ValidationError("A complex must close after it opens.")
+    open_minutes = (
+        _minutes(schedule.closes_at) - _minutes(schedule.opens_at)
+    )
+    if open_minutes % schedule.slot_minutes:
+        raise ValidationError(
+            "Opening hours must be a whole number of slots."
+        )
+    if schedule.slots_per_day > MAX_SLOTS_PER_DAY:
+        raise ValidationError(
+            f"A day has at most {MAX_SLOTS_PER_DAY} slots."
+        )
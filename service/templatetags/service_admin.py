@@ -0,0 +1,74 @@
+from datetime import date
+
+from django import template
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+register = template.Library()
+
+
+def _title(value, format_name):
+    return capfirst(formats.date_format(value, format_name))
+
+
+@register.inclusion_tag("admin/date_hierarchy.html")
+def date_range_hierarchy(cl):
+    """Django's ``date_hierarchy`` over the periods of a
+    ``DateRangeChangeList``, see ``service.admin``."""
+    field_name = cl.date_hierarchy
+    year_field = f"{field_name}__year"
+    month_field = f"{field_name}__month"
+    day_field = f"{field_name}__day"
+    year = cl.params.get(year_field)
+    month = cl.params.get(month_field)
+    day = cl.params.get(day_field)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    if not (year or month or day):
+        # Start at the level of the first period that holds every row.
+        first, last = cl.date_range()
+        if first and first.year == last.year:
+            year = first.year
+            if first.month == last.month:
+                month = first.month
+
+    if year and month and day:
+        selected = date(int(year), int(month), int(day))
+        back = {
+            "link": link({year_field: year, month_field: month}),
+            "title": _title(selected, "YEAR_MONTH_FORMAT"),
+        }
+        choices = [{"title": _title(selected, "MONTH_DAY_FORMAT")}]
+    elif year and month:
+        back = {"link": link({year_field: year}), "title": str(year)}
+        choices = [
+            {
+                "link": link({
+                    year_field: year, month_field: month, day_field: value.day
+                }),
+                "title": _title(value, "MONTH_DAY_FORMAT"),
+            }
+            for value in cl.date_periods("day")
+        ]
+    elif year:
+        back = {"link": link({}), "title": _("All dates")}
+        choices = [
+            {
+                "link": link({year_field: year, month_field: value.month}),
+                "title": _title(value, "YEAR_MONTH_FORMAT"),
+            }
+            for value in cl.date_periods("month")
+        ]
+    else:
+        back = None
+        choices = [
+            {
+                "link": link({year_field: str(value.year)}),
+                "title": str(value.year),
+            }
+            for value in cl.date_periods("year")
+        ]
+    return {"show": True, "back": back, "choices": choices}
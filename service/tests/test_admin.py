@@ -0,0 +1,65 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from service.models import Booking, SportsComplex, SportsField
+from service.slots import slot_key
+
+DAYS = (date(2026, 1, 10), date(2026, 3, 20), date(2026, 3, 22))
+
+
+class BookingDateHierarchyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser(
+            "hierarchy@example.com", "password"
+        )
+        sports_complex = SportsComplex.objects.create(
+            name="Hierarchy",
+            address="Hierarchy street",
+            phone="+380441234567",
+        )
+        field = SportsField.objects.create(complex=sports_complex, price=10)
+        Booking.objects.bulk_create(
+            Booking(
+                field=field,
+                day=day,
+                time=time(10),
+                slot=slot_key(day, time(10)),
+                personal_data=cls.staff,
+            )
+            for day in DAYS
+        )
+
+    def get(self, **params):
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:service_booking_changelist"), params
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(
+            "DISTINCT" in query["sql"] or "MIN(" in query["sql"]
+            for query in queries.captured_queries
+        ))
+        return response.content.decode()
+
+    def test_every_month_between_the_first_and_last_day(self):
+        content = self.get()
+        for month in (1, 2, 3):
+            self.assertIn(f"?day__month={month}&amp;day__year=2026", content)
+        self.assertNotIn("day__month=4", content)
+
+    def test_every_day_between_the_first_and_last_of_a_month(self):
+        content = self.get(day__year=2026, day__month=3)
+        for day in (20, 21, 22):
+            self.assertIn(
+                f"?day__day={day}&amp;day__month=3&amp;day__year=2026",
+                content,
+            )
+        self.assertNotIn("day__day=19", content)
+        self.assertNotIn("day__day=23", content)
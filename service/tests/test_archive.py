@@ -0,0 +1,111 @@
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from service.archive import archive_before
+from service.models import (
+    ArchivedBooking,
+    ArchivedPayment,
+    Booking,
+    FieldOccupancy,
+    Payment,
+    SportsComplex,
+    SportsField,
+    archive_horizon,
+)
+from service.occupancy import booking_masks
+from service.slots import slot_key
+from utilities.stripe import create_payment
+
+HOURS = (time(9), time(10), time(18))
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser(
+            "archive@example.com", "password"
+        )
+        cls.complex = SportsComplex.objects.create(
+            name="Archive",
+            address="Archive street",
+            phone="+380441234567",
+        )
+        cls.field = SportsField.objects.create(complex=cls.complex, price=10)
+        cls.day = archive_horizon() - timedelta(days=10)
+        # Days before the horizon cannot be booked any more, the rows are
+        # written like ones from before it moved.
+        Booking.objects.bulk_create(
+            Booking(
+                field=cls.field,
+                day=cls.day,
+                time=value,
+                slot=slot_key(cls.day, value),
+                personal_data=cls.staff,
+            )
+            for value in HOURS
+        )
+        FieldOccupancy.objects.bulk_create(
+            FieldOccupancy(field_id=field_id, day=day, slots=mask)
+            for field_id, day, mask in booking_masks()
+        )
+
+    def occupancy(self):
+        return list(
+            FieldOccupancy.objects.values_list("field_id", "day", "slots")
+        )
+
+    def test_archived_days_stay_occupied(self):
+        before = self.occupancy()
+        list(archive_before(archive_horizon()))
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(ArchivedBooking.objects.count(), len(HOURS))
+        self.assertEqual(self.occupancy(), before)
+
+    def test_rebuild_keeps_archived_days(self):
+        before = self.occupancy()
+        list(archive_before(archive_horizon()))
+        call_command("rebuild_occupancy", "--check", stdout=None)
+        call_command("rebuild_occupancy", stdout=None)
+        self.assertEqual(self.occupancy(), before)
+
+    def test_heatmap_counts_archived_bookings(self):
+        list(archive_before(archive_horizon()))
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse(
+                "admin:service_sportscomplex_heatmap", args=[self.complex.id]
+            ),
+            {"week": self.day.isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        row = next(
+            row for row in response.context["rows"] if row["day"] == self.day
+        )
+        self.assertEqual(
+            sum(cell["booked"] for cell in row["cells"]), len(HOURS)
+        )
+
+    def test_pending_payment_keeps_its_bookings(self):
+        bookings = list(Booking.objects.order_by("time"))
+        payment = create_payment(bookings[:2])
+        list(archive_before(archive_horizon()))
+        self.assertEqual(
+            set(Booking.objects.values_list("id", flat=True)),
+            {booking.id for booking in bookings[:2]},
+        )
+        self.assertTrue(Payment.objects.filter(pk=payment.pk).exists())
+        self.assertFalse(ArchivedPayment.objects.exists())
+
+    def test_paid_payment_moves_with_its_bookings(self):
+        payment = create_payment(list(Booking.objects.all()))
+        Payment.objects.filter(pk=payment.pk).update(
+            status=Payment.PaymentStatus.PAID
+        )
+        list(archive_before(archive_horizon()))
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(ArchivedPayment.objects.get().id, payment.id)
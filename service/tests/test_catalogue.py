@@ -0,0 +1,64 @@
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from service import catalogue, counters
+from service.models import SportsComplex
+
+
+def create_complex(name):
+    return SportsComplex.objects.create(
+        name=name, address=f"{name} street", phone="+380441234567"
+    )
+
+
+@override_settings(CATALOGUE_VERSION_TTL=3600)
+class CatalogueVersionTests(TestCase):
+    def setUp(self):
+        catalogue.clear()
+
+    def test_steady_reads_run_no_query(self):
+        catalogue.get_catalogue()
+        with self.assertNumQueries(0):
+            catalogue.get_catalogue()
+
+    def test_own_change_is_seen_once_it_commits(self):
+        catalogue.get_catalogue()
+        with self.captureOnCommitCallbacks(execute=True):
+            sports_complex = create_complex("Own")
+        self.assertIn(
+            sports_complex.id, catalogue.get_catalogue().complexes_by_id
+        )
+
+    def test_change_of_another_process_is_seen_after_the_version_ttl(self):
+        sports_complex = create_complex("Before")
+        catalogue.get_catalogue()
+        # Another process renames it, this one only sees the counter move.
+        SportsComplex.objects.filter(pk=sports_complex.pk).update(
+            name="After"
+        )
+        counters.bump([counters.CATALOGUE_KEY])
+
+        def name():
+            return catalogue.get_catalogue().complexes_by_id[
+                sports_complex.id
+            ]["name"]
+
+        self.assertEqual(name(), "Before")
+        with override_settings(CATALOGUE_VERSION_TTL=0):
+            self.assertEqual(name(), "After")
+
+
+@override_settings(CATALOGUE_CACHE="default", CATALOGUE_VERSION_TTL=0)
+class SharedCatalogueTests(TransactionTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        catalogue.clear()
+
+    def test_copy_is_shared_between_processes(self):
+        create_complex("Shared")
+        built = catalogue.get_catalogue()
+        # A new process has no copy of its own, it reads the version and
+        # the shared copy.
+        catalogue.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(catalogue.get_catalogue().digest, built.digest)
@@ -0,0 +1,90 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from service import counters
+from service.bookings import book_slots
+from service.models import (
+    Booking,
+    ChangeCounter,
+    FieldOccupancy,
+    SportsComplex,
+    SportsField,
+)
+from utilities.stripe import create_payment
+
+
+class BookingsVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("count@example.com")
+        cls.fields = {}
+        for location in ("Kyiv", "Lviv"):
+            sports_complex = SportsComplex.objects.create(
+                name=location,
+                address=f"{location} street",
+                phone="+380441234567",
+                location=location,
+            )
+            cls.fields[location] = SportsField.objects.create(
+                complex=sports_complex, price=10
+            )
+        cls.day = date.today() + timedelta(days=1)
+
+    def versions(self, day=None):
+        day = day or self.day
+        return {
+            location: counters.search_version(location, day)
+            for location in self.fields
+        }
+
+    def test_booking_writes_no_shared_counter(self):
+        counted = set(ChangeCounter.objects.values_list("key", "value"))
+        book_slots(self.fields["Kyiv"], self.user, [(self.day, time(10))])
+        self.assertEqual(
+            set(ChangeCounter.objects.values_list("key", "value")), counted
+        )
+
+    def test_booking_changes_only_its_city_and_day(self):
+        before = self.versions()
+        next_day = self.versions(self.day + timedelta(days=1))
+        book_slots(self.fields["Kyiv"], self.user, [(self.day, time(10))])
+        after = self.versions()
+        self.assertNotEqual(after["Kyiv"], before["Kyiv"])
+        self.assertEqual(after["Lviv"], before["Lviv"])
+        self.assertEqual(self.versions(self.day + timedelta(days=1)), next_day)
+
+    def test_moved_booking_changes_both_field_days(self):
+        booking, = book_slots(
+            self.fields["Kyiv"], self.user, [(self.day, time(10))]
+        )
+        later = self.day + timedelta(days=1)
+        before = self.versions(), self.versions(later)
+        booking.day = later
+        booking.slot += 96
+        booking.save()
+        self.assertNotEqual(self.versions()["Kyiv"], before[0]["Kyiv"])
+        self.assertNotEqual(self.versions(later)["Kyiv"], before[1]["Kyiv"])
+        self.assertEqual(
+            dict(FieldOccupancy.objects.values_list("day", "slots")),
+            {self.day: 0, later: 1 << 2},
+        )
+
+    def test_update_in_place_changes_the_version(self):
+        booking, = book_slots(
+            self.fields["Kyiv"], self.user, [(self.day, time(10))]
+        )
+        before = self.versions()
+        Booking.objects.get(pk=booking.pk).save()
+        self.assertNotEqual(self.versions()["Kyiv"], before["Kyiv"])
+
+    def test_paid_payment_changes_its_field_days(self):
+        bookings = book_slots(
+            self.fields["Lviv"], self.user, [(self.day, time(10))]
+        )
+        payment = create_payment(bookings)
+        before = self.versions()
+        counters.bump_paid([payment.id])
+        self.assertNotEqual(self.versions()["Lviv"], before["Lviv"])
+        self.assertEqual(self.versions()["Kyiv"], before["Kyiv"])
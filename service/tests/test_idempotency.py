@@ -0,0 +1,142 @@
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from service.bookings import book_slots
+from service.models import Booking, IdempotencyKey, SportsComplex, SportsField
+
+THREADS = 50
+
+
+def booking_request(field):
+    url = reverse("service:sportsfield-booking", args=[field.id])
+    day = date.today() + timedelta(days=1)
+    return url, {"day_time_slots": [{"day": day, "time": ["10:00"]}]}
+
+
+def create_field():
+    sports_complex = SportsComplex.objects.create(
+        name="Idempotency",
+        address="Idempotency street",
+        phone="+380441234567",
+    )
+    return SportsField.objects.create(complex=sports_complex, price=10)
+
+
+# Views read their throttles from APIView at import time.
+@patch.object(APIView, "throttle_classes", ())
+class ConcurrentIdempotencyKeyTests(TransactionTestCase):
+    def test_parallel_requests_with_one_key_book_once(self):
+        user = get_user_model().objects.create_user("retry@example.com")
+        url, data = booking_request(create_field())
+        barrier = threading.Barrier(THREADS)
+        statuses = Counter()
+        lock = threading.Lock()
+        answered = threading.Event()
+
+        def book_when_answered(*args, **kwargs):
+            # The claiming request finishes once every other one got its
+            # answer, so all of those arrive while it is in progress.
+            answered.wait(timeout=30)
+            return book_slots(*args, **kwargs)
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post(
+                    url, data, format="json", HTTP_IDEMPOTENCY_KEY="once"
+                )
+                with lock:
+                    statuses[response.status_code] += 1
+                    if statuses[409] == THREADS - 1:
+                        answered.set()
+            finally:
+                connection.close()
+
+        with patch(
+            "service.serializers.book_slots", side_effect=book_when_answered
+        ):
+            threads = [threading.Thread(target=post) for _ in range(THREADS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(statuses, {200: 1, 409: THREADS - 1})
+
+
+@patch.object(APIView, "throttle_classes", ())
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("key@example.com")
+        cls.field = create_field()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def claim(self, **kwargs):
+        return IdempotencyKey.objects.create(
+            user=self.user,
+            key="claimed",
+            request_hash="stale",
+            **kwargs
+        )
+
+    def post(self):
+        url, data = booking_request(self.field)
+        return self.client.post(
+            url, data, format="json", HTTP_IDEMPOTENCY_KEY="claimed"
+        )
+
+    def test_replay_of_a_stored_response(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_replay_only_reads_its_key(self):
+        self.post()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("SELECT"))
+
+    def test_different_request_with_a_claimed_key_is_rejected(self):
+        self.claim(expires_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.post().status_code, 422)
+
+    def test_expired_claim_is_taken_over(self):
+        claim = self.claim(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(Booking.objects.count(), 1)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.pk, claim.pk)
+        self.assertEqual(record.status_code, 200)
+
+    def test_other_expired_keys_stay_for_the_purge(self):
+        other = IdempotencyKey.objects.create(
+            user=self.user,
+            key="other",
+            request_hash="stale",
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.post()
+        self.assertTrue(IdempotencyKey.objects.filter(pk=other.pk).exists())
@@ -0,0 +1,76 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from service.bookings import book_slots
+from service.models import Booking, FieldOccupancy, SportsComplex, SportsField
+
+HOURS = [time(hour) for hour in range(9, 19)]
+
+
+class CascadeReleaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_model = get_user_model()
+        cls.kept = user_model.objects.create_user("kept@example.com")
+        cls.day = date.today() + timedelta(days=1)
+        sports_complex = SportsComplex.objects.create(
+            name="Cascade",
+            address="Cascade street",
+            phone="+380441234567",
+        )
+        cls.field = SportsField.objects.create(
+            complex=sports_complex, price=10
+        )
+        book_slots(cls.field, cls.kept, [(cls.day, time(8))])
+
+    def book(self, count):
+        user = get_user_model().objects.create_user(f"gone-{count}@x.com")
+        book_slots(
+            self.field, user, [(self.day, value) for value in HOURS[:count]]
+        )
+        return user
+
+    def delete(self, user):
+        with CaptureQueriesContext(connection) as queries:
+            user.delete()
+        return len(queries)
+
+    def test_deleted_user_releases_their_slots(self):
+        self.delete(self.book(3))
+        self.assertEqual(
+            FieldOccupancy.objects.get(field=self.field, day=self.day).slots,
+            1 << 0,
+        )
+
+    def test_cascade_loads_schedules_once(self):
+        few = self.delete(self.book(2))
+        many = self.delete(self.book(len(HOURS)))
+        # Only the release of each booking's slot, an insert of a missing
+        # row and the update, runs per row.
+        self.assertEqual(many - few, 2 * (len(HOURS) - 2))
+
+    def test_admin_bulk_delete_loads_schedules_once(self):
+        staff = get_user_model().objects.create_superuser(
+            "cascade-staff@example.com", "password"
+        )
+        self.book(len(HOURS))
+        self.client.force_login(staff)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse("admin:service_booking_changelist"), {
+                "action": "delete_selected",
+                "post": "yes",
+                "_selected_action": list(
+                    Booking.objects.values_list("pk", flat=True)
+                ),
+            })
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(any(
+            '"service_sportscomplex"' in query["sql"]
+            and '"service_booking"' not in query["sql"]
+            for query in queries.captured_queries
+        ))
@@ -0,0 +1,177 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from service.models import Booking, Payment, SportsComplex, SportsField
+from service.pagination import EstimatedCountPaginator
+from service.slots import slot_key
+from utilities.stripe import create_payment
+
+DAYS = 2
+HOURS = (time(9), time(10))
+FIELDS = 3
+
+
+def encode(cursor):
+    return urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+# Views read their throttles from APIView at import time.
+@patch.object(APIView, "throttle_classes", ())
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user_model = get_user_model()
+        cls.user = user_model.objects.create_user("pages@example.com")
+        for n in range(4):
+            user_model.objects.create_user(f"pages-{n}@example.com")
+        sports_complex = SportsComplex.objects.create(
+            name="Pages",
+            address="Pages street",
+            phone="+380441234567",
+        )
+        fields = [
+            SportsField.objects.create(complex=sports_complex, price=10)
+            for _ in range(FIELDS)
+        ]
+        first = date.today() + timedelta(days=1)
+        # Every day and time is booked on every field, the ids of a day
+        # and time are interleaved with the other ones.
+        Booking.objects.bulk_create(
+            Booking(
+                field=field,
+                day=first + timedelta(days=day),
+                time=value,
+                slot=slot_key(first + timedelta(days=day), value),
+                personal_data=cls.user,
+            )
+            for field in fields
+            for value in reversed(HOURS)
+            for day in reversed(range(DAYS))
+        )
+        bookings = list(Booking.objects.order_by("id"))
+        for n in range(0, len(bookings), 2):
+            create_payment(bookings[n:n + 2])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def pages(self, url, params, link="next"):
+        """Ids of every page from ``url`` on, following ``link``."""
+        pages = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, response.data)
+            pages.append([item["id"] for item in response.data["results"]])
+            url, params = response.data[link], None
+        return pages
+
+    def assert_round_trip(self, name, ordering, limit):
+        expected = list(ordering.values_list("id", flat=True))
+        forward = self.pages(
+            reverse(name), {"pagination": "cursor", "limit": limit}
+        )
+        self.assertEqual(sum(forward, []), expected)
+        self.assertEqual(
+            [len(page) for page in forward[:-1]],
+            [limit] * (len(forward) - 1),
+        )
+        # Back from the last page, every page the way it came.
+        response = self.client.get(reverse(name), {
+            "pagination": "cursor", "limit": limit,
+        })
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+        backward = self.pages(response.data["previous"], None, "previous")
+        self.assertEqual(backward[::-1], forward[:-1])
+
+    def test_bookings_round_trip_over_ties(self):
+        self.assert_round_trip(
+            "service:booking-list",
+            Booking.objects.order_by("day", "time", "id"),
+            limit=4,
+        )
+
+    def test_payments_round_trip(self):
+        self.assert_round_trip(
+            "service:payment-list", Payment.objects.order_by("id"), limit=2
+        )
+
+    def test_users_round_trip(self):
+        self.assert_round_trip(
+            "client:users",
+            get_user_model().objects.order_by("id"),
+            limit=2,
+        )
+
+    def test_count_on_request(self):
+        url = reverse("service:booking-list")
+        response = self.client.get(url, {"pagination": "cursor"})
+        self.assertNotIn("count", response.data)
+        response = self.client.get(
+            url, {"pagination": "cursor", "count": "true"}
+        )
+        self.assertEqual(response.data["count"], Booking.objects.count())
+
+    def test_invalid_cursor_is_rejected(self):
+        for name in ("service:booking-list", "service:payment-list"):
+            # Not base64 JSON, a value of the wrong type.
+            for cursor in ("garbage", encode({"p": ["x"]})):
+                with self.subTest(name=name, cursor=cursor):
+                    response = self.client.get(
+                        reverse(name), {"cursor": cursor}
+                    )
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("cursor", response.data)
+
+    def test_limit_offset_by_default(self):
+        url = reverse("service:booking-list")
+        response = self.client.get(url, {"limit": 4, "offset": 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], Booking.objects.count())
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            list(Booking.objects.values_list("id", flat=True)[4:8]),
+        )
+        self.assertIn("offset=8", response.data["next"])
+        self.assertNotIn("cursor=", response.data["next"])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.bulk_create(
+            get_user_model()(email=f"count-{n}@example.com")
+            for n in range(5)
+        )
+
+    def paginator(self):
+        return EstimatedCountPaginator(
+            get_user_model().objects.order_by("id"), 2
+        )
+
+    def test_exact_count_without_an_estimate(self):
+        # SQLite has no planner estimate.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.paginator().count, 5)
+
+    def test_exact_count_below_the_threshold(self):
+        with patch("service.pagination.planner_estimate", return_value=7):
+            self.assertEqual(self.paginator().count, 5)
+
+    def test_large_estimate_is_not_counted(self):
+        with patch(
+            "service.pagination.planner_estimate",
+            return_value=EstimatedCountPaginator.exact_below,
+        ), self.assertNumQueries(0):
+            paginator = self.paginator()
+            self.assertEqual(paginator.count, paginator.exact_below)
+            self.assertEqual(paginator.num_pages, paginator.exact_below // 2)
@@ -0,0 +1,243 @@
+from datetime import date, time, timedelta
+from typing import Callable, NamedTuple, Optional
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from about.models import FAQ, Feedback
+from service import catalogue, search_cache
+from service.bookings import book_slots
+from service.models import SportsComplex, SportsField
+from utilities.stripe import create_payment
+
+NAMESPACES = ("service", "client", "about")
+
+
+class Budget(NamedTuple):
+    name: str
+    queries: int
+    user: Optional[str] = "client"
+    method: str = "get"
+    target: Optional[str] = None
+    query: str = ""
+    data: Optional[Callable] = None
+
+
+def booking_data(targets):
+    day = date.today() + timedelta(days=40)
+    return {"day_time_slots": [{"day": day, "time": ["10:00"]}]}
+
+
+def single_booking_data(targets):
+    day = date.today() + timedelta(days=40)
+    return {
+        "field": targets["field"],
+        "day": day,
+        "time": "11:00",
+        "personal_data": targets["client"].id,
+    }
+
+
+def payment_data(targets):
+    return {"bookings": [targets["unpaid"][0]]}
+
+
+# Budgets are measured with force_authenticate; a JWT adds one user query.
+# They count full responses. Conditional views spend one to three of them on
+# their ETag, which is all a 304 costs. The catalogue and its version are
+# held locally, reading them costs nothing in steady state.
+BUDGETS = [
+    Budget("service:api-root", 0, user=None),
+    Budget("service:sportscomplex-list", 0, user=None),
+    Budget(
+        "service:sportscomplex-list",
+        3,
+        user=None,
+        query="?activity=Football&location=Kyiv&date={day}&time=18:00",
+    ),
+    Budget("service:sportscomplex-detail", 4, user=None, target="complex"),
+    Budget(
+        "service:sportscomplex-availability",
+        4,
+        user=None,
+        target="complex",
+    ),
+    Budget("service:sportsfield-list", 0, user=None),
+    Budget("service:sportsfield-detail", 0, user=None, target="field"),
+    Budget("service:sportsfield-bookings", 4, user=None, target="field"),
+    Budget(
+        "service:sportsfield-availability", 3, user=None, target="field"
+    ),
+    Budget(
+        "service:sportsfield-booking",
+        6,
+        method="post",
+        target="field",
+        data=booking_data,
+    ),
+    Budget("service:booking-list", 2),
+    Budget(
+        "service:booking-list", 7, method="post", data=single_booking_data
+    ),
+    Budget("service:booking-detail", 1, target="booking"),
+    Budget("service:booking-export", 2, user="staff"),
+    Budget("service:payment-list", 3),
+    Budget("service:payment-list", 3, user="staff"),
+    Budget("service:payment-list", 8, method="post", data=payment_data),
+    Budget("service:payment-detail", 2, target="payment"),
+    Budget("service:payment-success", 1, target="payment"),
+    Budget("service:payment-cancel", 0, target="payment"),
+    Budget("service:payment-export", 2, user="staff"),
+    Budget("service:usage-analytics", 3, user="staff"),
+    Budget("client:me", 0),
+    Budget("client:schedule", 5),
+    Budget("client:users", 2),
+    Budget("about:api-root", 0, user=None),
+    Budget("about:faq-list", 3, user=None),
+    Budget("about:faq-detail", 2, user=None, target="faq"),
+    Budget("about:feedback-list", 2, user=None),
+    Budget("about:feedback-detail", 1, user=None, target="feedback"),
+]
+
+
+def readable_endpoints():
+    """Names of every GET endpoint of the API namespaces."""
+    names = set()
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(
+                    pattern.url_patterns,
+                    pattern.namespace or namespace
+                )
+                continue
+            view = getattr(pattern.callback, "cls", None)
+            actions = getattr(pattern.callback, "actions", None)
+            readable = (
+                "get" in actions if actions else hasattr(view, "get")
+            )
+            if namespace in NAMESPACES and pattern.name and readable:
+                names.add(f"{namespace}:{pattern.name}")
+
+    walk(get_resolver().url_patterns, None)
+    return names
+
+
+def seed(scale):
+    """Add ``scale`` units of data, each about 50 rows.
+
+    The first complex, field, booking and payment are the targets of the
+    requests, every unit adds bookings and payments of their client.
+    """
+    user_model = get_user_model()
+    targets = {
+        "client": user_model.objects.create_user("budget-client@example.com"),
+        "staff": user_model.objects.create_superuser(
+            "budget-staff@example.com", "password"
+        ),
+        "unpaid": [],
+    }
+
+    start = date.today() + timedelta(days=1)
+    for n in range(scale):
+        other = user_model.objects.create_user(f"budget-{n}@example.com")
+        sports_complex = SportsComplex.objects.create(
+            name=f"Budget {n}",
+            address=f"Budget street {n}",
+            phone="+380441234567",
+            location="Kyiv",
+        )
+        targets.setdefault("complex", sports_complex.id)
+        for activity in ("Football", "Tennis"):
+            field = SportsField.objects.create(
+                complex=sports_complex, activity=activity, price=10
+            )
+            targets.setdefault("field", field.id)
+            for owner, hour in ((targets["client"], 9), (other, 12)):
+                bookings = book_slots(field, owner, [
+                    (start + timedelta(days=day), time(hour + offset))
+                    for day in range(3)
+                    for offset in range(2)
+                ])
+                payment = create_payment(bookings[:2])
+                if owner == targets["client"]:
+                    targets.setdefault("booking", bookings[0].id)
+                    targets.setdefault("payment", payment.id)
+                    targets["unpaid"].append(bookings[-1].id)
+        FAQ.objects.create(question=f"Question {n}", answer="Answer")
+        Feedback.objects.create(info=f"Feedback {n}")
+
+    targets["faq"] = FAQ.objects.values_list("id", flat=True).first()
+    targets["feedback"] = Feedback.objects.values_list(
+        "id", flat=True
+    ).first()
+    return targets
+
+
+class BudgetCoverageTests(TestCase):
+    def test_every_readable_endpoint_has_a_budget(self):
+        self.assertEqual(
+            readable_endpoints() - {budget.name for budget in BUDGETS},
+            set()
+        )
+
+
+# Views read their throttles from APIView at import time. The catalogue
+# version is read in setUp, later reads are steady ones.
+@patch.object(APIView, "throttle_classes", ())
+@override_settings(CATALOGUE_VERSION_TTL=3600)
+class QueryBudgetTests(TestCase):
+    """Every endpoint runs exactly its budgeted queries."""
+
+    scale = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.targets = seed(cls.scale)
+
+    def setUp(self):
+        # Cached catalogues and searches may come from other tests' rows,
+        # the signals only drop them on commit.
+        catalogue.clear()
+        catalogue.get_catalogue()
+        search_cache.clear()
+
+    def test_endpoints_within_budget(self):
+        clients = {}
+        for budget in BUDGETS:
+            if budget.user not in clients:
+                clients[budget.user] = APIClient()
+                if budget.user:
+                    clients[budget.user].force_authenticate(
+                        self.targets[budget.user]
+                    )
+            kwargs = (
+                {"pk": self.targets[budget.target]} if budget.target else {}
+            )
+            url = reverse(budget.name, kwargs=kwargs) + budget.query.format(
+                day=date.today() + timedelta(days=1)
+            )
+            data = budget.data(self.targets) if budget.data else None
+            user = budget.user or "anonymous"
+            with self.subTest(f"{budget.method.upper()} {url} [{user}]"):
+                with self.assertNumQueries(budget.queries):
+                    response = getattr(clients[budget.user], budget.method)(
+                        url, data, format="json"
+                    )
+                    if response.streaming:
+                        # Exports query while their content is consumed.
+                        b"".join(response.streaming_content)
+                self.assertLess(
+                    response.status_code, 400, getattr(response, "data", None)
+                )
+
+
+class LargeQueryBudgetTests(QueryBudgetTests):
+    """The same budgets with ten times the rows, no count grows with them."""
+
+    scale = 10
@@ -0,0 +1,61 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from service.models import (
+    ArchivedBooking,
+    Booking,
+    SportsComplex,
+    SportsField,
+)
+from service.slots import slot_key
+
+
+class ScheduleChangeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("hours@example.com")
+        cls.complex = SportsComplex.objects.create(
+            name="Hours",
+            address="Hours street",
+            phone="+380441234567",
+        )
+        cls.field = SportsField.objects.create(complex=cls.complex, price=10)
+
+    def change_hours(self):
+        self.complex.opens_at = time(9)
+        self.complex.clean()
+
+    def test_change_without_bookings(self):
+        self.change_hours()
+
+    def test_change_with_a_past_booking_is_rejected(self):
+        day = date.today() - timedelta(days=1)
+        Booking.objects.bulk_create([
+            Booking(
+                field=self.field,
+                day=day,
+                time=time(10),
+                slot=slot_key(day, time(10)),
+                personal_data=self.user,
+            )
+        ])
+        with self.assertRaises(ValidationError):
+            self.change_hours()
+
+    def test_change_with_an_archived_booking_is_rejected(self):
+        day = date.today() - timedelta(days=400)
+        ArchivedBooking.objects.create(
+            id=1,
+            field=self.field,
+            day=day,
+            time=time(10),
+            slot=slot_key(day, time(10)),
+            created_at=timezone.now(),
+            personal_data=self.user,
+        )
+        with self.assertRaises(ValidationError):
+            self.change_hours()
@@ -0,0 +1,97 @@
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from service import catalogue, search_cache
+from service.models import Booking, FieldOccupancy, SportsComplex, SportsField
+from service.occupancy import booking_masks
+from service.slots import DEFAULT_SCHEDULE, slot_key
+
+COMPLEXES = 20
+MORNING = [value for value in DEFAULT_SCHEDULE.times() if value < time(14)]
+
+
+@override_settings(CATALOGUE_VERSION_TTL=3600)
+class ComplexSearchTests(TestCase):
+    """Complexes with a free field, half of them full on the searched day.
+
+    Every field of a full complex is booked all day and every field of the
+    others all morning, ``BOOKINGS`` bookings on the searched day in all.
+    """
+
+    BOOKINGS = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user("search@example.com")
+        cls.day = date.today() + timedelta(days=1)
+        per_field = len(DEFAULT_SCHEDULE.times()) + len(MORNING)
+        fields_per_complex = -(-cls.BOOKINGS * 2 // (COMPLEXES * per_field))
+        cls.free = []
+        bookings = []
+        for n in range(COMPLEXES):
+            sports_complex = SportsComplex.objects.create(
+                name=f"Search {n}",
+                address=f"Search street {n}",
+                phone="+380441234567",
+                location="Kyiv",
+            )
+            full = n % 2 == 0
+            if not full:
+                cls.free.append(sports_complex.id)
+            fields = SportsField.objects.bulk_create(
+                SportsField(
+                    complex=sports_complex,
+                    activity=("Football", "Tennis")[m % 2],
+                    price=10
+                )
+                for m in range(fields_per_complex)
+            )
+            times = DEFAULT_SCHEDULE.times() if full else MORNING
+            bookings += [
+                Booking(
+                    field=field,
+                    day=cls.day,
+                    time=value,
+                    slot=slot_key(cls.day, value),
+                    personal_data=user,
+                )
+                for field in fields
+                for value in times
+            ]
+        Booking.objects.bulk_create(bookings)
+        FieldOccupancy.objects.bulk_create(
+            FieldOccupancy(field_id=field_id, day=day, slots=mask)
+            for field_id, day, mask in booking_masks()
+        )
+
+    def setUp(self):
+        search_cache.clear()
+        catalogue.clear()
+        catalogue.get_catalogue()
+
+    def test_search_by_date_and_time_runs_fixed_queries(self):
+        self.assertGreaterEqual(
+            Booking.objects.filter(day=self.day).count(), self.BOOKINGS
+        )
+        url = reverse("service:sportscomplex-list")
+        # The ETag version, the version of the search cache key, the search.
+        with self.assertNumQueries(3):
+            response = APIClient().get(url, {
+                "activity": "Football",
+                "date": self.day.isoformat(),
+                "time": "18:00",
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], self.free
+        )
+
+
+class LargeComplexSearchTests(ComplexSearchTests):
+    """The same search with ten times the bookings, 10k on its day."""
+
+    BOOKINGS = 10000
@@ -5,7 +5,8 @@ from service.views import (
     SportsComplexViewSet,
     SportsFieldViewSet,
     BookingViewSet,
-    PaymentViewSet
+    PaymentViewSet,
+    UsageAnalyticsView,
 )
 
 router = routers.DefaultRouter()
@@ -15,7 +16,12 @@ router.register("bookings", BookingViewSet)
 router.register("payments", PaymentViewSet)
 
 urlpatterns = [
-    path("", include(router.urls))
+    path("", include(router.urls)),
+    path(
+        "analytics/usage/",
+        UsageAnalyticsView.as_view(),
+        name="usage-analytics"
+    ),
 ]
 
 app_name = "service"
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+
+from rest_framework.exceptions import ValidationError
+
+
+def get_date_range(
+        query_params,
+        default_days: int,
+        max_days: int
+) -> tuple[date, date]:
+    """Read the ``from``/``to`` query parameters as an inclusive range."""
+    dates = {}
+    for name in ("from", "to"):
+        value = query_params.get(name)
+        if not value:
+            continue
+        try:
+            dates[name] = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValidationError({name: "Date must be in YYYY-MM-DD format."})
+
+    date_from = dates.get("from", date.today())
+    date_to = dates.get("to", date_from + timedelta(days=default_days - 1))
+
+    if date_to < date_from:
+        raise ValidationError({"to": "Must not be earlier than 'from'."})
+    if (date_to - date_from).days >= max_days:
+        raise ValidationError(
+            {"to": f"Range must not be longer than {max_days} days."}
+        )
+    return date_from, date_to
+
+
+def days_between(date_from: date, date_to: date) -> list[date]:
+    return [
+        date_from + timedelta(days=n)
+        for n in range((date_to - date_from).days + 1)
+    ]
+
+
+BOOKINGS_DEFAULT_DAYS = 14
+BOOKINGS_MAX_DAYS = 62
+
+
+def get_bookings_window(query_params) -> tuple[date, date]:
+    """Date range of bookings embedded in complex and schedule responses."""
+    return get_date_range(
+        query_params,
+        BOOKINGS_DEFAULT_DAYS,
+        BOOKINGS_MAX_DAYS
+    )
@@ -1,15 +1,28 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime
 
 import stripe
-from django.db import transaction
-from django.db.models import Q
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Prefetch,
+    Value,
+    When,
+)
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 
 from service.serializers import (
     SportsComplexSerializer,
@@ -18,14 +31,227 @@ from service.serializers import (
     SportsFieldSerializer,
     SportsFieldBookingSerializer,
     BookingSerializer,
+    BookingCustomSerializer,
     PaymentSerializer
 )
-from service.models import SportsComplex, SportsField, Booking, Payment
+from service.models import (
+    SportsComplex,
+    SportsField,
+    FieldOccupancy,
+    Booking,
+    Payment,
+    PaymentLine
+)
+from service import counters
+from service.archive import archived_prefetch, with_archived
+from service.analytics import usage_report, ACTIVITIES
+from service.catalogue import (
+    complexes_with_ids,
+    get_catalogue,
+    search_complexes,
+    with_absolute_images,
+)
+from service.conditional import conditional, make_etag
+from service.export import (
+    booking_rows,
+    export_response,
+    get_export_filters,
+    payment_rows,
+    BOOKING_COLUMNS,
+    PAYMENT_COLUMNS,
+    EXPORT_FORMATS,
+)
+from service.occupancy import free_slots
+from service.idempotency import idempotent, IDEMPOTENCY_KEY_PARAMETER
+from service.search_cache import cached_search
+from service.pagination import BookingPagination, PaymentPagination
 from service.permissions import IsAdminOrReadOnly
-from utilities.stripe import stripe_helper
+from service.slots import day_keys
+from service.utils import (
+    get_date_range,
+    get_bookings_window,
+    days_between,
+    BOOKINGS_DEFAULT_DAYS,
+    BOOKINGS_MAX_DAYS,
+)
+from utilities.stripe import create_payment, construct_event, process_event
+
+AVAILABILITY_DEFAULT_DAYS = 7
+AVAILABILITY_MAX_DAYS = 62
+
+BOOKINGS_PARAMETERS = [
+    OpenApiParameter(
+        name="from",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description="First day of included bookings, defaults to today",
+    ),
+    OpenApiParameter(
+        name="to",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description=(
+            "Last day of included bookings, defaults to "
+            f"{BOOKINGS_DEFAULT_DAYS} days from 'from'. At most "
+            f"{BOOKINGS_MAX_DAYS} days are included, use "
+            "/sports-fields/{id}/bookings/ for longer ranges"
+        ),
+    ),
+]
+FIELD_BOOKINGS_MAX_DAYS = 366
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 3660
+
+ANALYTICS_PARAMETERS = [
+    OpenApiParameter(
+        name="from",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description="First day of the report, defaults to today",
+    ),
+    OpenApiParameter(
+        name="to",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description=(
+            f"Last day of the report, defaults to {ANALYTICS_DEFAULT_DAYS} "
+            f"days from 'from'. At most {ANALYTICS_MAX_DAYS} days"
+        ),
+    ),
+    OpenApiParameter(
+        name="complex",
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        description="Only this sports complex",
+    ),
+    OpenApiParameter(
+        name="activity",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        enum=ACTIVITIES,
+        description="Only fields of this activity",
+    ),
+]
+
+AVAILABILITY_PARAMETERS = [
+    OpenApiParameter(
+        name="from",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description="First day of the grid, defaults to today",
+    ),
+    OpenApiParameter(
+        name="to",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description=(
+            "Last day of the grid, defaults to a week from 'from'. "
+            f"At most {AVAILABILITY_MAX_DAYS} days are returned"
+        ),
+    ),
+]
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        name="type",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        enum=list(EXPORT_FORMATS),
+        description="Output format, defaults to ndjson",
+    ),
+    OpenApiParameter(
+        name="from",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description="First day of exported bookings",
+    ),
+    OpenApiParameter(
+        name="to",
+        type=OpenApiTypes.DATE,
+        location=OpenApiParameter.QUERY,
+        description="Last day of exported bookings",
+    ),
+    OpenApiParameter(
+        name="complex",
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        description="Only bookings of this sports complex",
+    ),
+]
+
+
+def complexes_etag(view, request, *args, **kwargs):
+    """Catalogue digest, plus the bookings version of the searched city and
+    day."""
+    params = request.query_params
+    digest = view.catalogue.digest
+    if not (params.get("date") or params.get("time")):
+        return make_etag(request, digest)
+    try:
+        day = datetime.strptime(params.get("date", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return make_etag(
+        request,
+        digest,
+        counters.search_version(params.get("location"), day)
+    )
+
+
+def complex_bookings_etag(view, request, pk=None, **kwargs):
+    """Catalogue digest and the bookings version of the complex.
+
+    Responses are read from the database, the default date window moves
+    with today.
+    """
+    try:
+        complex_id = int(pk)
+    except ValueError:
+        return None
+    return make_etag(
+        request,
+        date.today(),
+        view.catalogue.digest,
+        counters.bookings_version(field__complex_id=complex_id)
+    )
+
+
+def fields_etag(view, request, *args, **kwargs):
+    return make_etag(request, view.catalogue.digest)
+
+
+def field_bookings_etag(view, request, pk=None, **kwargs):
+    """Like ``complex_bookings_etag`` for the field alone."""
+    try:
+        field_id = int(pk)
+    except ValueError:
+        return None
+    if field_id not in view.catalogue.fields_by_id:
+        return None
+    return make_etag(
+        request,
+        date.today(),
+        view.catalogue.digest,
+        counters.bookings_version(field_id=field_id)
+    )
 
 
-class SportsComplexViewSet(ModelViewSet):
+def usage_etag(view, request, *args, **kwargs):
+    return make_etag(
+        request,
+        date.today(),
+        counters.read([counters.ROLLUP_KEY, counters.CATALOGUE_KEY])
+    )
+
+
+class CatalogueMixin:
+    @cached_property
+    def catalogue(self):
+        """The catalogue, its version is read once per request."""
+        return get_catalogue()
+
+
+class SportsComplexViewSet(CatalogueMixin, ModelViewSet):
     queryset = SportsComplex.objects.all()
     serializer_class = SportsComplexSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -46,9 +272,28 @@ class SportsComplexViewSet(ModelViewSet):
         time_str = self.request.query_params.get("time")
 
         if self.action == "retrieve":
-            queryset = queryset.prefetch_related("fields__bookings")
+            date_from, date_to = get_bookings_window(
+                self.request.query_params
+            )
+            return queryset.prefetch_related(
+                Prefetch(
+                    "fields__bookings",
+                    queryset=Booking.objects.filter(
+                        slot__range=day_keys(date_from, date_to)
+                    ).order_by("slot")
+                ),
+                *archived_prefetch(
+                    "fields__archived_bookings", date_from, date_to
+                )
+            )
+        if self.action != "list":
+            return queryset
 
-        field_queryset = SportsField.objects.all()
+        queryset = queryset.prefetch_related("fields")
+        field_queryset = SportsField.objects.filter(complex=OuterRef("pk"))
+        busy_days = FieldOccupancy.objects.filter(
+            field=OuterRef("pk")
+        ).exclude(slots=0)
 
         if activity:
             field_queryset = field_queryset.filter(activity__iexact=activity)
@@ -58,33 +303,43 @@ class SportsComplexViewSet(ModelViewSet):
         if date_str:
             try:
                 date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                conflicting_bookings_date = Booking.objects.filter(day=date)
-                for booking in conflicting_bookings_date:
-                    field_queryset = field_queryset.exclude(
-                        id=booking.field.id
-                    )
             except ValueError:
                 return queryset.none()
+            busy_days = busy_days.filter(day=date)
 
         if time_str:
             try:
                 time = datetime.strptime(time_str, "%H:%M").time()
-                conflicting_bookings_time = Booking.objects.filter(
-                    Q(time__lte=(datetime.combine(datetime.today(), time)
-                                 + timedelta(hours=1)).time())
-                    & Q(time__gte=(datetime.combine(datetime.today(), time)
-                                   - timedelta(hours=1)).time())
-                )
-
-                for booking in conflicting_bookings_time:
-                    field_queryset = field_queryset.exclude(
-                        id=booking.field.id
-                    )
             except ValueError:
                 return queryset.none()
+            # The slots near the time differ between schedules, every
+            # complex gets the mask of its own.
+            queryset = queryset.annotate(
+                window=Case(
+                    *(
+                        When(
+                            opens_at=schedule.opens_at,
+                            closes_at=schedule.closes_at,
+                            slot_minutes=schedule.slot_minutes,
+                            then=Value(schedule.window_mask(time)),
+                        )
+                        for schedule in set(self.catalogue.schedules.values())
+                    ),
+                    default=Value(0),
+                    output_field=BigIntegerField()
+                )
+            )
+            busy_days = busy_days.annotate(
+                conflicts=ExpressionWrapper(
+                    F("slots").bitand(OuterRef(OuterRef("window"))),
+                    output_field=BigIntegerField()
+                )
+            ).exclude(conflicts=0)
 
-        queryset = queryset.filter(fields__in=field_queryset).distinct()
-        return queryset
+        if date_str or time_str:
+            field_queryset = field_queryset.filter(~Exists(busy_days))
+
+        return queryset.filter(Exists(field_queryset))
 
     @extend_schema(
         parameters=[
@@ -114,8 +369,54 @@ class SportsComplexViewSet(ModelViewSet):
             ),
         ]
     )
+    @conditional(complexes_etag)
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        params = request.query_params
+        activity = params.get("activity")
+        location = params.get("location")
+        date_str = params.get("date")
+        time_str = params.get("time")
+
+        if date_str or time_str:
+            complexes = complexes_with_ids(
+                self.catalogue,
+                self.search(activity, location, date_str, time_str)
+            )
+        else:
+            # Without date/time nothing depends on bookings, so the search
+            # runs over the cached catalogue.
+            complexes = search_complexes(self.catalogue, activity, location)
+
+        page = self.paginate_queryset(complexes)
+        if page is not None:
+            return self.get_paginated_response(
+                with_absolute_images(request, page)
+            )
+        return Response(with_absolute_images(request, complexes))
+
+    def search(self, activity, location, date_str, time_str):
+        def matching_ids():
+            return list(
+                self.get_queryset().order_by("id").values_list(
+                    "id", flat=True
+                )
+            )
+
+        try:
+            day = datetime.strptime(date_str or "", "%Y-%m-%d").date()
+            at = datetime.strptime(time_str, "%H:%M").time() \
+                if time_str else None
+        except ValueError:
+            # Searches over every day and invalid filters are not cached.
+            return matching_ids()
+        return cached_search(
+            activity, location, day, at, self.catalogue.digest, matching_ids
+        )
+
+    @extend_schema(parameters=BOOKINGS_PARAMETERS)
+    @conditional(complex_bookings_etag)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(methods=["POST"], detail=True, url_path="upload-image")
     def upload_image(self, request, pk=None):
@@ -126,8 +427,55 @@ class SportsComplexViewSet(ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(parameters=AVAILABILITY_PARAMETERS)
+    @action(methods=["GET"], detail=True, url_path="availability")
+    @conditional(complex_bookings_etag)
+    def availability(self, request, pk=None):
+        """Free/busy grid of every field of the complex, 1 marks a free slot"""
+        sports_complex = self.get_object()
+        date_from, date_to = get_date_range(
+            request.query_params,
+            AVAILABILITY_DEFAULT_DAYS,
+            AVAILABILITY_MAX_DAYS
+        )
+        days = days_between(date_from, date_to)
+        schedule = sports_complex.schedule
+        fields = sports_complex.fields.prefetch_related(
+            Prefetch(
+                "occupancy",
+                queryset=FieldOccupancy.objects.filter(
+                    day__range=(date_from, date_to)
+                )
+            )
+        )
+        return Response(
+            {
+                "complex": sports_complex.id,
+                "from": date_from,
+                "to": date_to,
+                "hours": schedule.labels(),
+                "days": days,
+                "fields": [
+                    {
+                        "id": field.id,
+                        "activity": field.activity,
+                        "free": free_slots(
+                            schedule,
+                            {
+                                row.day: row.slots
+                                for row in field.occupancy.all()
+                            },
+                            days
+                        ),
+                    }
+                    for field in fields
+                ],
+            },
+            status=status.HTTP_200_OK
+        )
+
 
-class SportsFieldViewSet(ModelViewSet):
+class SportsFieldViewSet(CatalogueMixin, ModelViewSet):
     queryset = SportsField.objects.select_related("complex").all()
     serializer_class = SportsFieldSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -135,14 +483,37 @@ class SportsFieldViewSet(ModelViewSet):
     def get_serializer_class(self):
         if self.action == "booking":
             return SportsFieldBookingSerializer
+        if self.action == "bookings":
+            return BookingCustomSerializer
         return self.serializer_class
 
+    @conditional(fields_etag)
+    def list(self, request, *args, **kwargs):
+        fields = self.catalogue.fields
+        page = self.paginate_queryset(fields)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(fields)
+
+    @conditional(fields_etag)
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs["pk"])
+        except ValueError:
+            raise NotFound
+        field = self.catalogue.fields_by_id.get(pk)
+        if field is None:
+            raise NotFound
+        return Response(field)
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
     @action(
         methods=["POST"],
         detail=True,
         url_path="booking",
         permission_classes=[IsAuthenticated]
     )
+    @idempotent
     def booking(self, request, pk=None):
         sports_field = self.get_object()
         serializer = self.get_serializer(data=request.data)
@@ -154,6 +525,81 @@ class SportsFieldViewSet(ModelViewSet):
             status=status.HTTP_200_OK
         )
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="from",
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description="First day of bookings, defaults to today",
+            ),
+            OpenApiParameter(
+                name="to",
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Last day of bookings, defaults to "
+                    f"{BOOKINGS_DEFAULT_DAYS} days from 'from'. At most "
+                    f"{FIELD_BOOKINGS_MAX_DAYS} days are included"
+                ),
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="bookings")
+    @conditional(field_bookings_etag)
+    def bookings(self, request, pk=None):
+        """Paginated bookings of the field within a date range"""
+        sports_field = self.get_object()
+        date_from, date_to = get_date_range(
+            request.query_params,
+            BOOKINGS_DEFAULT_DAYS,
+            FIELD_BOOKINGS_MAX_DAYS
+        )
+        keys = day_keys(date_from, date_to)
+        bookings = with_archived(
+            sports_field.bookings.filter(slot__range=keys),
+            sports_field.archived_bookings.filter(slot__range=keys),
+            date_from
+        ).order_by("slot")
+
+        page = self.paginate_queryset(bookings)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(bookings, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(parameters=AVAILABILITY_PARAMETERS)
+    @action(methods=["GET"], detail=True, url_path="availability")
+    @conditional(field_bookings_etag)
+    def availability(self, request, pk=None):
+        """Free/busy grid of the field, 1 marks a free slot"""
+        sports_field = self.get_object()
+        date_from, date_to = get_date_range(
+            request.query_params,
+            AVAILABILITY_DEFAULT_DAYS,
+            AVAILABILITY_MAX_DAYS
+        )
+        days = days_between(date_from, date_to)
+        masks = dict(
+            FieldOccupancy.objects.filter(
+                field=sports_field,
+                day__range=(date_from, date_to)
+            ).values_list("day", "slots")
+        )
+        schedule = sports_field.complex.schedule
+        return Response(
+            {
+                "field": sports_field.id,
+                "from": date_from,
+                "to": date_to,
+                "hours": schedule.labels(),
+                "days": days,
+                "free": free_slots(schedule, masks, days),
+            },
+            status=status.HTTP_200_OK
+        )
+
 
 class BookingViewSet(ModelViewSet):
     queryset = Booking.objects.select_related(
@@ -162,55 +608,80 @@ class BookingViewSet(ModelViewSet):
     ).all()
     serializer_class = BookingSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = BookingPagination
 
     def get_queryset(self):
-        return self.queryset.filter(personal_data=self.request.user)
+        queryset = self.queryset.filter(personal_data=self.request.user)
+        if self.action == "destroy":
+            # The delete signal reads the schedule of the field's complex.
+            queryset = queryset.select_related("field__complex")
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(personal_data=self.request.user)
 
+    @extend_schema(parameters=EXPORT_PARAMETERS, responses={200: bytes})
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="export",
+        permission_classes=[IsAdminUser]
+    )
+    def export(self, request):
+        """Stream every booking with its field, complex and user"""
+        return export_response(
+            request,
+            "bookings",
+            booking_rows(get_export_filters(request.query_params)),
+            BOOKING_COLUMNS
+        )
+
 
 class PaymentViewSet(ModelViewSet):
     serializer_class = PaymentSerializer
     queryset = Payment.objects.select_related(
-        "booking"
-    ).all()
+        "outbox"
+    ).prefetch_related("bookings")
     permission_classes = (IsAuthenticated,)
+    pagination_class = PaymentPagination
 
     def get_queryset(self):
-        queryset = Payment.objects.all()
+        queryset = self.queryset
         if not self.request.user.is_staff:
             queryset = queryset.filter(
-                booking__personal_data=self.request.user
+                Exists(
+                    PaymentLine.objects.filter(
+                        payment=OuterRef("pk"),
+                        booking__personal_data=self.request.user
+                    )
+                )
             )
         return queryset
 
-    def perform_create(self, serializer):
-        serializer.save(booking__personal_data=self.request.user)
-
-    @transaction.atomic
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
     def create(self, request, *args, **kwargs):
+        """Create a payment, its checkout session follows asynchronously.
+
+        Poll the payment until checkout_status is DONE to get session_url.
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        booking = serializer.validated_data["booking"]
-        payment = stripe_helper(booking)
+        payment = create_payment(serializer.validated_data["bookings"])
 
-        serializer = self.get_serializer(payment[0])
+        serializer = self.get_serializer(payment)
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data,
-            status=status.HTTP_201_CREATED,
+            status=status.HTTP_202_ACCEPTED,
             headers=headers
         )
 
     @action(detail=True, methods=["GET"], url_path="success")
     def success(self, request, pk=None):
-        payment = Payment.objects.get(id=pk)
-        session = stripe.checkout.Session.retrieve(payment.session_id)
-        if session.payment_status == "paid":
-            payment.status = "PAID"
-            payment.save()
+        payment = get_object_or_404(Payment, id=pk)
+        if payment.status == Payment.PaymentStatus.PAID:
             return Response(
                 {"message": "Payment success"}, status=status.HTTP_200_OK
             )
@@ -218,9 +689,87 @@ class PaymentViewSet(ModelViewSet):
             {"message": "Payment wasn't paid"}, status=status.HTTP_200_OK
         )
 
+    @extend_schema(parameters=EXPORT_PARAMETERS, responses={200: bytes})
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="export",
+        permission_classes=[IsAdminUser]
+    )
+    def export(self, request):
+        """Stream every payment line with its booking, complex and user"""
+        return export_response(
+            request,
+            "payments",
+            payment_rows(get_export_filters(request.query_params)),
+            PAYMENT_COLUMNS
+        )
+
+    @extend_schema(request=None, responses={200: None, 400: None})
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="webhook",
+        permission_classes=[AllowAny],
+        authentication_classes=[],
+        throttle_classes=[]
+    )
+    def webhook(self, request):
+        """Stripe webhook, marks payments of completed sessions as paid"""
+        try:
+            event = construct_event(
+                request.body,
+                request.headers.get("Stripe-Signature", "")
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return Response(
+                {"message": "Invalid payload or signature"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        processed = process_event(event)
+        return Response(
+            {"message": "Processed" if processed else "Already processed"},
+            status=status.HTTP_200_OK
+        )
+
     @action(detail=True, methods=["GET"], url_path="cancel")
     def cancel(self, request, pk=None):
         return Response(
             {"message": "Payment canceled"},
             status=status.HTTP_200_OK
         )
+
+
+class UsageAnalyticsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(parameters=ANALYTICS_PARAMETERS, responses={200: dict})
+    @conditional(usage_etag)
+    def get(self, request):
+        """Occupancy and paid revenue by complex, activity and hour of day.
+
+        Served from the daily rollups of ``rollup_usage``, days changed
+        since its last run are not included yet.
+        """
+        params = request.query_params
+        date_from, date_to = get_date_range(
+            params,
+            ANALYTICS_DEFAULT_DAYS,
+            ANALYTICS_MAX_DAYS
+        )
+        complex_id = params.get("complex")
+        if complex_id:
+            try:
+                complex_id = int(complex_id)
+            except ValueError:
+                raise ValidationError({"complex": "Must be a complex id."})
+        activity = params.get("activity")
+        if activity and activity not in ACTIVITIES:
+            raise ValidationError(
+                {"activity": f"Must be one of: {', '.join(ACTIVITIES)}."}
+            )
+        return Response(
+            usage_report(date_from, date_to, complex_id or None, activity),
+            status=status.HTTP_200_OK
+        )
@@ -62,6 +62,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "utilities.metrics.PerformanceMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -108,6 +109,10 @@ DATABASES = {
 
 db_from_env = dj_database_url.config(conn_max_age=500)
 DATABASES["default"].update(db_from_env)
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Tests with threads need a file, the in-memory test database of SQLite
+    # locks whole tables against other connections.
+    DATABASES["default"]["TEST"] = {"NAME": BASE_DIR / "test_db.sqlite3"}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -158,11 +163,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "utilities.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/minute", "user": "30/minute"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("THROTTLE_RATE_ANON", "10/minute"),
+        "user": os.getenv("THROTTLE_RATE_USER", "30/minute"),
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
@@ -192,9 +204,39 @@ SIMPLE_JWT = {
 
 INTERNAL_IPS = ["127.0.0.1"]
 
+# Bearer token for /metrics/ requests from outside INTERNAL_IPS
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# How long a claimed key waits for its request before a retry may take it
+IDEMPOTENCY_KEY_LEASE = timedelta(minutes=2)
+
+# Django cache alias sharing built catalogues between workers, empty to
+# keep them per process; see service.catalogue
+CATALOGUE_CACHE = os.getenv("CATALOGUE_CACHE", "")
+# Seconds a process keeps a catalogue copy
+CATALOGUE_CACHE_TTL = int(os.getenv("CATALOGUE_CACHE_TTL", "300"))
+# Seconds a process trusts the catalogue version it read last
+CATALOGUE_VERSION_TTL = float(os.getenv("CATALOGUE_VERSION_TTL", "1"))
+
+# Complex searches with a date kept per process, see service.search_cache
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "2048"))
+
+# Bookings older than this many days may be moved to the archive tables by
+# the archive_bookings command. Lowering it is safe, raising it hides
+# archived bookings from ranges that start after the old horizon
+BOOKING_ARCHIVE_DAYS = int(os.getenv("BOOKING_ARCHIVE_DAYS", "365"))
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "https://sport-space.vercel.app"
 ]
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+STRIPE_PRODUCT_ID = os.getenv("STRIPE_PRODUCT_ID", "prod_Pz5uWC2BXMLDzx")
+STRIPE_CURRENCY = os.getenv("STRIPE_CURRENCY", "usd")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+
+# Replace Stripe with the in-process stand-in from utilities.stripe_stub
+STRIPE_STUB = os.getenv("STRIPE_STUB", "") == "True"
+STRIPE_STUB_LATENCY = float(os.getenv("STRIPE_STUB_LATENCY", "0"))
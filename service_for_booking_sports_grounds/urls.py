@@ -25,6 +25,8 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from utilities.metrics import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path(
@@ -40,6 +42,7 @@ urlpatterns = [
          include("about.urls", namespace="about"),
     ),
     path("__debug__/", include("debug_toolbar.urls")),
+    path("metrics/", metrics, name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
       "api/swagger/",
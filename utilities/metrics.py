@@ -0,0 +1,287 @@
+"""Per-request timings, Server-Timing headers and a Prometheus endpoint.
+
+``PerformanceMiddleware`` measures every request: wall time, database
+queries and their time, time ``TimedJSONRenderer`` spends rendering
+response data and time spent in Stripe calls wrapped with
+``track("stripe")``. The numbers are sent back in a ``Server-Timing``
+header and aggregated per view, e.g. ``SportsComplexViewSet.list``, in an
+in-process registry that ``metrics`` serves in the Prometheus text format.
+Streaming responses are aggregated once their content is closed and get
+no header, it is sent before the content is produced. Each worker process
+keeps its own registry, so scrape every worker or sum them.
+"""
+import bisect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.renderers import JSONRenderer
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestTimings:
+    __slots__ = (
+        "db_queries",
+        "db",
+        "serializer",
+        "stripe",
+        "stripe_calls",
+    )
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.stripe = 0.0
+        self.stripe_calls = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.db_queries += 1
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def track(kind):
+    """Add the time spent in the block to the current request's ``kind``."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(
+            timings, kind, getattr(timings, kind) + time.perf_counter() - start
+        )
+        if kind == "stripe":
+            timings.stripe_calls += 1
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.duration = defaultdict(lambda: Histogram(DURATION_BUCKETS))
+        self.queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.totals = defaultdict(lambda: defaultdict(float))
+        self.counters = defaultdict(lambda: defaultdict(int))
+
+    def observe(self, view, status_code, total, timings):
+        with self.lock:
+            self.duration[view].observe(total)
+            self.queries[view].observe(timings.db_queries)
+            totals = self.totals[view]
+            totals["db"] += timings.db
+            totals["serializer"] += timings.serializer
+            totals["stripe"] += timings.stripe
+            self.counters[view][f"{status_code // 100}xx"] += 1
+
+    def increment(self, name, labels="", value=1):
+        with self.lock:
+            self.counters[name][labels] += value
+
+    def render(self):
+        lines = []
+        with self.lock:
+            self._histograms(
+                lines,
+                "http_request_duration_seconds",
+                "Request wall time per view",
+                self.duration,
+            )
+            self._histograms(
+                lines,
+                "http_request_db_queries",
+                "Database queries per request per view",
+                self.queries,
+            )
+            for kind in ("db", "serializer", "stripe"):
+                name = f"http_request_{kind}_seconds_total"
+                lines.append(
+                    f"# HELP {name} Time spent in {kind} per view"
+                )
+                lines.append(f"# TYPE {name} counter")
+                for view, totals in sorted(self.totals.items()):
+                    lines.append(
+                        f'{name}{{view="{view}"}} {totals[kind]:.6f}'
+                    )
+            lines.append("# HELP http_responses_total Responses per view")
+            lines.append("# TYPE http_responses_total counter")
+            for view in sorted(self.duration):
+                for code, count in sorted(self.counters[view].items()):
+                    lines.append(
+                        f'http_responses_total{{view="{view}",'
+                        f'status="{code}"}} {count}'
+                    )
+            for name, values in sorted(self.counters.items()):
+                if name in self.duration:
+                    continue
+                lines.append(f"# TYPE {name} counter")
+                for labels, count in sorted(values.items()):
+                    label_text = f"{{{labels}}}" if labels else ""
+                    lines.append(f"{name}{label_text} {count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histograms(lines, name, help_text, histograms):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for view, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(
+                histogram.buckets + ("+Inf",), histogram.counts
+            ):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(f'{name}_sum{{view="{view}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+
+
+registry = MetricsRegistry()
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSON renderer adding its time to the request's serializer time.
+
+    Every API response is rendered once, so serialization is measured in
+    one place instead of in every serializer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with track("serializer"):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+
+def view_name(view_func, method):
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f"{cls.__name__}.{action}"
+
+
+def _timed_stream(content, timings, done):
+    """Yield ``content`` with every chunk measured into ``timings``.
+
+    ``done`` is called once the content is exhausted or closed.
+    """
+    iterator = iter(content)
+    try:
+        while True:
+            token = _current.set(timings)
+            try:
+                with connection.execute_wrapper(timings):
+                    chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        done()
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        view = getattr(request, "_metrics_view", "unresolved")
+        if response.streaming:
+            response.streaming_content = _timed_stream(
+                response.streaming_content,
+                timings,
+                lambda: registry.observe(
+                    view,
+                    response.status_code,
+                    time.perf_counter() - start,
+                    timings
+                )
+            )
+            return response
+
+        total = time.perf_counter() - start
+        registry.observe(view, response.status_code, total, timings)
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={total * 1000:.1f}",
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.db_queries} '
+            f'queries"',
+            f"serializer;dur={timings.serializer * 1000:.1f}",
+            f'stripe;dur={timings.stripe * 1000:.1f};desc="'
+            f'{timings.stripe_calls} calls"',
+        ])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_name(view_func, request.method)
+
+
+def metrics(request):
+    """Prometheus scrape endpoint.
+
+    Open to ``INTERNAL_IPS``, otherwise it requires
+    ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = settings.METRICS_TOKEN
+    authorized = (
+        request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+        or (
+            token
+            and request.headers.get("Authorization") == f"Bearer {token}"
+        )
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
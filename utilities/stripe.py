@@ -1,60 +1,230 @@
-from django.shortcuts import redirect
+from collections import Counter
+from datetime import timedelta
+from threading import Lock
+
+from cachetools import LRUCache, cached
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.http import HttpRequest
 from django.urls import reverse
+from django.utils import timezone
 import stripe
 
-from service.models import Booking, Payment
+from service import counters
+from service.models import (
+    Booking,
+    Payment,
+    PaymentLine,
+    PaymentOutbox,
+    StripePrice,
+    StripeEvent,
+)
+from utilities.metrics import track
+from utilities.stripe_stub import FakeStripe
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+if settings.STRIPE_STUB:
+    client = FakeStripe(latency=settings.STRIPE_STUB_LATENCY)
+else:
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    client = stripe
 
 
 def calculate_total_amount(
         booking: Booking
 ) -> int:
     price_cents = booking.field.price * 100
-    looking_price = int(price_cents)
+    return int(price_cents)
+
+
+@cached(LRUCache(maxsize=1024), lock=Lock())
+def get_price_id(
+        unit_amount: int,
+        product: str = settings.STRIPE_PRODUCT_ID,
+        currency: str = settings.STRIPE_CURRENCY
+) -> str:
+    """Return the id of a Stripe price, creating it only once.
 
-    return stripe.Price.create(
-        product="prod_Pz5uWC2BXMLDzx",
-        unit_amount=looking_price,
-        currency="usd",
+    Prices are kept in the StripePrice table, so checkouts for the same
+    amount reuse one price across processes, and in an LRU in front of it.
+    """
+    price_id = StripePrice.objects.filter(
+        product=product,
+        unit_amount=unit_amount,
+        currency=currency
+    ).values_list("price_id", flat=True).first()
+    if price_id:
+        return price_id
+
+    with track("stripe"):
+        price = client.Price.create(
+            product=product,
+            unit_amount=unit_amount,
+            currency=currency,
+        )
+    stripe_price, _ = StripePrice.objects.get_or_create(
+        product=product,
+        unit_amount=unit_amount,
+        currency=currency,
+        defaults={"price_id": price.id}
     )
+    return stripe_price.price_id
 
 
-def session(price, payment):
+def session(line_items, payment):
     request = HttpRequest()
     request.META["SERVER_NAME"] = settings.SERVER_NAME
     request.META["SERVER_PORT"] = settings.SERVER_PORT
-    checkout_session = stripe.checkout.Session.create(
-        line_items=[
-            {
-                "price": price,
-                "quantity": 1,
-            },
-        ],
-        mode="payment",
-        success_url=request.build_absolute_uri(
-            location=reverse("service:payment-success",
-                             kwargs={"pk": payment.id})
-        ),
-        cancel_url=request.build_absolute_uri(
-            location=reverse("service:payment-cancel",
-                             kwargs={"pk": payment.id})
-        ),
-    )
+    with track("stripe"):
+        checkout_session = client.checkout.Session.create(
+            line_items=line_items,
+            mode="payment",
+            success_url=request.build_absolute_uri(
+                location=reverse("service:payment-success",
+                                 kwargs={"pk": payment.id})
+            ),
+            cancel_url=request.build_absolute_uri(
+                location=reverse("service:payment-cancel",
+                                 kwargs={"pk": payment.id})
+            ),
+            idempotency_key=f"checkout-session-{payment.id}",
+        )
     return checkout_session
 
 
-def stripe_helper(booking: Booking):
-    price = calculate_total_amount(booking)
-    payment = Payment.objects.create(
-        booking=booking,
-        money_to_pay=price["unit_amount"] / 100,
+def retrieve_session(session_id):
+    with track("stripe"):
+        return client.checkout.Session.retrieve(session_id)
+
+
+PAID_SESSION_EVENTS = (
+    "checkout.session.completed",
+    "checkout.session.async_payment_succeeded",
+)
+
+
+def construct_event(payload: bytes, signature: str):
+    """Parse a webhook payload, raising if the signature does not match.
+
+    Without ``STRIPE_WEBHOOK_SECRET`` no signature matches, see the
+    ``service.W001`` check.
+    """
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise stripe.error.SignatureVerificationError(
+            "STRIPE_WEBHOOK_SECRET is not set", signature, payload
+        )
+    return stripe.Webhook.construct_event(
+        payload, signature, settings.STRIPE_WEBHOOK_SECRET
+    )
+
+
+def process_event(event) -> bool:
+    """Apply a webhook event once, return False for a repeated delivery."""
+    try:
+        with transaction.atomic():
+            StripeEvent.objects.create(event_id=event.id, type=event.type)
+            if event.type in PAID_SESSION_EVENTS:
+                checkout_session = event.data.object
+                if checkout_session.payment_status == "paid":
+                    payments = Payment.objects.filter(
+                        session_id=checkout_session.id
+                    )
+                    payments.update(status=Payment.PaymentStatus.PAID)
+                    counters.bump_paid(payments)
+    except IntegrityError:
+        return False
+    return True
+
+
+def create_payment(bookings: list[Booking]) -> Payment:
+    """Create one payment for all ``bookings`` and queue its checkout.
+
+    The payment, its lines and the outbox row are written in one
+    transaction; the session itself is created later by ``dispatch_outbox``.
+    """
+    amounts = [calculate_total_amount(booking) for booking in bookings]
+    with transaction.atomic():
+        payment = Payment.objects.create(money_to_pay=sum(amounts) / 100)
+        PaymentLine.objects.bulk_create([
+            PaymentLine(payment=payment, booking=booking, unit_amount=amount)
+            for booking, amount in zip(bookings, amounts)
+        ])
+        PaymentOutbox.objects.create(payment=payment)
+    return payment
+
+
+def create_checkout_session(payment: Payment):
+    """Create one session with a line item per distinct booking price."""
+    quantities = Counter(
+        payment.lines.values_list("unit_amount", flat=True)
     )
+    line_items = [
+        {"price": get_price_id(unit_amount), "quantity": quantity}
+        for unit_amount, quantity in sorted(quantities.items())
+    ]
+    return session(line_items, payment)
+
+
+def claim_outbox(batch_size: int, lease: timedelta) -> list[PaymentOutbox]:
+    """Lease a batch of due outbox rows to this worker.
+
+    Rows stay PROCESSING until the lease runs out, after which another
+    worker may pick them up again if this one died.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            PaymentOutbox.objects.select_for_update(skip_locked=True).filter(
+                status__in=[
+                    PaymentOutbox.OutboxStatus.PENDING,
+                    PaymentOutbox.OutboxStatus.PROCESSING,
+                ],
+                available_at__lte=now
+            ).order_by("available_at").values_list("id", flat=True)[
+                :batch_size
+            ]
+        )
+        PaymentOutbox.objects.filter(id__in=ids).update(
+            status=PaymentOutbox.OutboxStatus.PROCESSING,
+            attempts=F("attempts") + 1,
+            available_at=now + lease
+        )
+    return list(
+        PaymentOutbox.objects.filter(id__in=ids).select_related("payment")
+    )
+
+
+def dispatch_outbox(
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        lease: timedelta = timedelta(minutes=5)
+) -> Counter:
+    """Create checkout sessions for a batch of queued payments."""
+    results = Counter()
+    for outbox in claim_outbox(batch_size, lease):
+        payment = outbox.payment
+        try:
+            checkout_session = create_checkout_session(payment)
+        except Exception as error:
+            outbox.last_error = str(error)
+            if outbox.attempts >= max_attempts:
+                outbox.status = PaymentOutbox.OutboxStatus.FAILED
+            else:
+                outbox.status = PaymentOutbox.OutboxStatus.PENDING
+                outbox.available_at = timezone.now() + timedelta(
+                    seconds=2 ** outbox.attempts
+                )
+            outbox.save()
+            results["failed"] += 1
+            continue
 
-    checkout_session = session(price, payment)
-    payment.session_url = checkout_session.url
-    payment.session_id = checkout_session.id
-    payment.save()
-    return payment, redirect(checkout_session.url, code=303)
+        with transaction.atomic():
+            payment.session_url = checkout_session.url
+            payment.session_id = checkout_session.id
+            payment.save(update_fields=["session_url", "session_id"])
+            outbox.status = PaymentOutbox.OutboxStatus.DONE
+            outbox.last_error = ""
+            outbox.processed_at = timezone.now()
+            outbox.save()
+        results["done"] += 1
+    return results
@@ -0,0 +1,115 @@
+"""In-process stand-in for the parts of the Stripe API the service uses.
+
+Enabled with ``STRIPE_STUB=True``. Every call is counted in ``calls`` and
+can be slowed down with ``STRIPE_STUB_LATENCY`` (seconds) to mimic the
+network round trip.
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+
+import stripe
+
+
+class FakeStripe:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.prices = {}
+        self.sessions = {}
+        self.idempotent_sessions = {}
+        self._lock = threading.Lock()
+
+        self.Price = SimpleNamespace(create=self.create_price)
+        self.checkout = SimpleNamespace(
+            Session=SimpleNamespace(
+                create=self.create_session,
+                retrieve=self.retrieve_session,
+            )
+        )
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _object(values):
+        return stripe.StripeObject.construct_from(values, "sk_test_stub")
+
+    def create_price(self, product, unit_amount, currency, **kwargs):
+        self._call("Price.create")
+        price = {
+            "id": f"price_{uuid.uuid4().hex[:24]}",
+            "object": "price",
+            "product": product,
+            "unit_amount": unit_amount,
+            "currency": currency,
+        }
+        self.prices[price["id"]] = price
+        return self._object(price)
+
+    def create_session(self, line_items, idempotency_key=None, **kwargs):
+        self._call("checkout.Session.create")
+        if idempotency_key in self.idempotent_sessions:
+            return self._object(self.idempotent_sessions[idempotency_key])
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "url": f"https://checkout.stripe.test/pay/{session_id}",
+            "payment_status": "unpaid",
+            "status": "open",
+            "line_items": line_items,
+            **kwargs,
+        }
+        self.sessions[session_id] = session
+        if idempotency_key:
+            self.idempotent_sessions[idempotency_key] = session
+        return self._object(session)
+
+    def retrieve_session(self, session_id, **kwargs):
+        self._call("checkout.Session.retrieve")
+        try:
+            return self._object(self.sessions[session_id])
+        except KeyError:
+            raise stripe.error.InvalidRequestError(
+                f"No such checkout.session: '{session_id}'", "id"
+            )
+
+    def pay(self, session_id):
+        """Mark a session as paid, as if the customer completed checkout."""
+        self.sessions[session_id].update(
+            payment_status="paid", status="complete"
+        )
+
+    def webhook(self, event_type, session_id, secret):
+        """Build a signed webhook request body for a session event.
+
+        Returns ``(payload, signature)`` for the ``Stripe-Signature`` header.
+        """
+        payload = json.dumps({
+            "id": f"evt_{uuid.uuid4().hex[:24]}",
+            "object": "event",
+            "type": event_type,
+            "data": {"object": self.sessions[session_id]},
+        })
+        timestamp = int(time.time())
+        digest = hmac.new(
+            secret.encode(),
+            f"{timestamp}.{payload}".encode(),
+            hashlib.sha256
+        ).hexdigest()
+        return payload.encode(), f"t={timestamp},v1={digest}"
+
+    def reset(self):
+        self.calls.clear()
+        self.prices.clear()
+        self.sessions.clear()
+        self.idempotent_sessions.clear()